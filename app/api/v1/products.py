@@ -6,9 +6,12 @@
 """
 
 import logging
-from typing import List, Optional
+from typing import Any, Awaitable, Callable, Dict, List, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import ORJSONResponse
+from pydantic import ValidationError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.db import get_db
@@ -16,7 +19,8 @@ from app.models.models import ProxyCategory, ProxyType, ProviderType
 from app.schemas.proxy_product import (
     ProxyProductResponse, ProductFilter, ProductListResponse,
     ProductsByCategoryResponse, CountryResponse, CategoryStatsResponse,
-    ProductAvailabilityResponse, ProductStatsResponse
+    ProductAvailabilityResponse, ProductStatsResponse,
+    ProductBatchRequest, ProductBatchResult
 )
 from app.services.product_service import product_service
 
@@ -24,10 +28,43 @@ logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/products", tags=["Products"])
 
 
-@router.get("/", response_model=ProductListResponse)
+async def _list_products(
+    db: AsyncSession,
+    product_filter: ProductFilter,
+    *,
+    page: int,
+    per_page: int,
+    after_id: Optional[int] = None
+) -> ProductListResponse:
+    """Страница каталога - общая для GET / и пакетных запросов."""
+    products, total = await product_service.get_products_with_filter(
+        db,
+        filter_params=product_filter,
+        skip=(page - 1) * per_page,
+        limit=per_page,
+        after_id=after_id
+    )
+
+    pages = (total + per_page - 1) // per_page if total > 0 else 0
+
+    return ProductListResponse(
+        items=products,
+        total=total,
+        page=page,
+        per_page=per_page,
+        pages=pages
+    )
+
+
+# Страницы каталога - самые объемные ответы API, сериализуем их через orjson
+@router.get("/", response_model=ProductListResponse, response_class=ORJSONResponse)
 async def get_products(
     page: int = Query(1, ge=1, description="Номер страницы"),
     per_page: int = Query(20, ge=1, le=100, description="Размер страницы"),
+    after_id: Optional[int] = Query(
+        None, ge=0, description="Курсор: ID последнего продукта предыдущей страницы (вместо page)"
+    ),
+    ids: Optional[str] = Query(None, description="ID продуктов через запятую"),
     search: Optional[str] = Query(None, description="Поиск по названию"),
     proxy_category: Optional[ProxyCategory] = Query(None, description="Категория прокси"),
     proxy_type: Optional[ProxyType] = Query(None, description="Тип прокси"),
@@ -42,9 +79,23 @@ async def get_products(
 ):
     """
     Получение списка продуктов с фильтрацией и пагинацией.
+
+    С after_id используется keyset-пагинация: продукты идут по возрастанию ID
+    начиная после курсора, параметры page и sort игнорируются.
+    С ids возвращаются только перечисленные продукты - несколько карточек
+    одним запросом вместо отдельного GET /{product_id} на каждую.
     """
+    try:
+        product_ids = [int(product_id) for product_id in ids.split(",") if product_id.strip()] if ids else None
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="ids must be a comma-separated list of integers"
+        ) from None
+
     try:
         product_filter = ProductFilter(
+            ids=product_ids,
             search=search,
             proxy_category=proxy_category,
             proxy_type=proxy_type,
@@ -57,20 +108,7 @@ async def get_products(
             featured_only=featured_only
         )
 
-        # Получаем продукты
-        products, total = await product_service.get_products_with_filter(
-            db, filter_params=product_filter, skip=(page - 1) * per_page, limit=per_page
-        )
-
-        pages = (total + per_page - 1) // per_page if total > 0 else 0
-
-        return ProductListResponse(
-            items=products,
-            total=total,
-            page=page,
-            per_page=per_page,
-            pages=pages
-        )
+        return await _list_products(db, product_filter, page=page, per_page=per_page, after_id=after_id)
 
     except Exception as e:
         logger.error(f"Error getting products: {e}")
@@ -182,7 +220,7 @@ async def get_products_by_category(
 async def get_countries(db: AsyncSession = Depends(get_db)):
     """Получение списка доступных стран."""
     try:
-        countries = await product_service.get_available_countries(db)
+        countries = await product_service.get_available_countries_cached(db)
         return [CountryResponse(**country) for country in countries]
     except Exception as e:
         logger.error(f"Error getting countries: {e}")
@@ -259,3 +297,67 @@ async def get_product_recommendations(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to get product recommendations"
         )
+
+
+async def _batch_products(db: AsyncSession, params: Dict[str, Any]) -> ProductListResponse:
+    page = int(params.get("page", 1))
+    per_page = min(max(int(params.get("per_page", 20)), 1), 100)
+    after_id = params.get("after_id")
+    product_filter = ProductFilter(**{
+        key: value for key, value in params.items() if key in ProductFilter.model_fields
+    })
+    return await _list_products(
+        db, product_filter,
+        page=max(page, 1),
+        per_page=per_page,
+        after_id=int(after_id) if after_id is not None else None
+    )
+
+
+# Read-only запросы каталога, доступные в пакете. /stats, /categories/stats
+# и /countries не входят: словари сервиса не совпадают с их схемами ответа
+_BATCH_HANDLERS: Dict[str, Callable[[AsyncSession, Dict[str, Any]], Awaitable[Any]]] = {
+    "/": _batch_products,
+}
+
+
+@router.post("/batch", response_model=List[ProductBatchResult])
+async def batch_products(
+    batch_request: ProductBatchRequest,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Пакетное выполнение GET-запросов каталога.
+
+    Запросы выполняются последовательно, а не параллельно: все они идут
+    через одну сессию БД, а AsyncSession не допускает конкурентных операций.
+    Результаты возвращаются одним ответом - клиенту, которому нужно несколько
+    страниц каталога сразу, достаточно одного HTTP-вызова вместо N. Ошибка
+    одного запроса не прерывает пакет и возвращается в его status_code.
+    """
+    results = []
+    for query in batch_request.queries:
+        handler = _BATCH_HANDLERS.get(query.path)
+        if handler is None:
+            results.append(ProductBatchResult(
+                path=query.path, status_code=status.HTTP_404_NOT_FOUND, body={"detail": "Not found"}
+            ))
+            continue
+
+        try:
+            body = await handler(db, query.params)
+            results.append(ProductBatchResult(
+                path=query.path, status_code=status.HTTP_200_OK, body=jsonable_encoder(body)
+            ))
+        except (ValidationError, ValueError) as e:
+            results.append(ProductBatchResult(
+                path=query.path, status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, body={"detail": str(e)}
+            ))
+        except Exception as e:
+            logger.error(f"Error in batch query {query.path}: {e}")
+            results.append(ProductBatchResult(
+                path=query.path, status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                body={"detail": "Failed to process query"}
+            ))
+
+    return results
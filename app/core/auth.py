@@ -26,7 +26,7 @@ logger = logging.getLogger(__name__)
 pwd_context = CryptContext(
     schemes=["bcrypt"],
     deprecated="auto",
-    bcrypt__rounds=12  # Увеличиваем rounds для большей безопасности
+    bcrypt__rounds=settings.bcrypt_rounds
 )
 
 class AuthHandler:
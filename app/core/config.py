@@ -90,6 +90,7 @@ class Settings(BaseSettings):
         le=43200,
         description="Access token expiration in minutes"
     )
+    bcrypt_rounds: int = Field(default=12, ge=4, le=31, description="bcrypt cost factor for password hashing")
 
     @field_validator('secret_key')
     @classmethod
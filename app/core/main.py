@@ -1 +1 @@
-"""Главный модуль приложения FastAPI.Настройка и инициализация всех компонентов приложения:- Конфигурация FastAPI- Подключение middleware и роутов- Настройка lifecycle events- Health checks и мониторинг"""import loggingfrom contextlib import asynccontextmanagerfrom datetime import datetimefrom typing import Dict, Anyfrom fastapi import FastAPI, Requestfrom fastapi.responses import JSONResponsefrom starlette.exceptions import HTTPException as StarletteHTTPExceptionfrom app.core.config import settingsfrom app.core.db import close_db, check_db_healthfrom app.core.logging_config import setup_loggingfrom app.core.middleware import setup_middleware, setup_error_handlersfrom app.core.migrations import init_alembicfrom app.core.redis import redis_client, get_redis_healthfrom app.api.v1 import (    auth,    users,    products,    cart,    orders,    payments,    proxies)# Настройка логированияsetup_logging()logger = logging.getLogger(__name__)# Глобальные переменные для метрикapp_start_time = datetime.now()request_count = 0error_count = 0startup_tasks: list = []startup_errors: list = []@asynccontextmanagerasync def lifespan(application: FastAPI):    """    Управление жизненным циклом приложения.    Выполняет инициализацию при старте и очистке при завершении.    Args:        application: Экземпляр FastAPI приложения    """    global startup_tasks, startup_errors  # ИСПРАВЛЕНО: используем глобальные переменные    # === STARTUP ===    logger.info("🚀 Starting Gemup Marketplace API...")    logger.info(f"📊 Environment: {settings.environment}")    logger.info(f"📊 Debug mode: {settings.debug}")    logger.info(f"📊 Version: {settings.app_version}")    startup_tasks = []    startup_errors = []    try:        # 1. Проверка подключения к БД        logger.info("🔄 Checking database connection...")        db_healthy = await check_db_health()        if db_healthy:            logger.info("✅ Database connection established")            startup_tasks.append("Database")        else:            logger.error("❌ Database connection failed")            startup_errors.append("Database connection failed")    except Exception as db_error:        logger.error(f"❌ Database initialization error: {db_error}")        startup_errors.append(f"Database: {str(db_error)}")    try:        # 2. Подключение к Redis        logger.info("🔄 Connecting to Redis...")        await redis_client.connect()        redis_healthy = await get_redis_health()        if redis_healthy:            logger.info("✅ Redis connection established")            startup_tasks.append("Redis")        else:            logger.warning("⚠️ Redis connection failed, continuing without cache")            startup_errors.append("Redis connection failed")    except Exception as redis_error:        logger.error(f"❌ Redis connection error: {redis_error}")        startup_errors.append(f"Redis: {str(redis_error)}")    try:        # 3. Выполнение миграций (неблокирующее)        if settings.environment != "test":            logger.info("🔄 Running database migrations...")            await init_alembic()            logger.info("✅ Database migrations completed")            startup_tasks.append("Migrations")    except Exception as migration_error:        logger.warning(f"⚠️ Migration error (non-critical): {migration_error}")        startup_errors.append(f"Migrations: {str(migration_error)}")    # 4. Дополнительная инициализация    try:        # Очистка просроченных сессий        if hasattr(redis_client, 'redis') and redis_client.redis:            if hasattr(redis_client, 'cleanup_expired_sessions'):                cleaned = await redis_client.cleanup_expired_sessions()                logger.info(f"🧹 Cleaned {cleaned} expired sessions")        # Проверка настроек        if hasattr(settings, 'validate_required_settings'):            missing_settings = settings.validate_required_settings()            if missing_settings:                logger.warning(f"⚠️ Missing settings: {', '.join(missing_settings)}")                startup_errors.extend(missing_settings)    except Exception as init_error:        logger.error(f"❌ Additional initialization error: {init_error}")        startup_errors.append(f"Additional init: {str(init_error)}")    # Логируем результаты запуска    logger.info(f"✅ Startup completed. Tasks: {', '.join(startup_tasks)}")    if startup_errors:        logger.warning(f"⚠️ Startup warnings: {', '.join(startup_errors)}")    # ИСПРАВЛЕНО: Безопасное сохранение в state    try:        # Инициализируем state если нужно        if not hasattr(application, 'state'):            from starlette.datastructures import State            application.state = State()        application.state.startup_time = app_start_time        application.state.startup_tasks = startup_tasks.copy()        application.state.startup_errors = startup_errors.copy()    except Exception as state_error:        logger.warning(f"Could not save to app.state: {state_error}")    logger.info("🎉 Gemup Marketplace API is ready!")    yield    # === SHUTDOWN ===    logger.info("🛑 Shutting down Gemup Marketplace API...")    shutdown_tasks = []    shutdown_errors = []    try:        # 1. Закрытие соединений с БД        logger.info("🔄 Closing database connections...")        await close_db()        logger.info("✅ Database connections closed")        shutdown_tasks.append("Database")    except Exception as db_shutdown_error:        logger.error(f"❌ Database shutdown error: {db_shutdown_error}")        shutdown_errors.append(f"Database: {str(db_shutdown_error)}")    try:        # 2. Отключение от Redis        logger.info("🔄 Disconnecting from Redis...")        await redis_client.disconnect()        logger.info("✅ Redis disconnected")        shutdown_tasks.append("Redis")    except Exception as redis_shutdown_error:        logger.error(f"❌ Redis shutdown error: {redis_shutdown_error}")        shutdown_errors.append(f"Redis: {str(redis_shutdown_error)}")    # Логируем результаты завершения    logger.info(f"✅ Shutdown completed. Tasks: {', '.join(shutdown_tasks)}")    if shutdown_errors:        logger.warning(f"⚠️ Shutdown warnings: {', '.join(shutdown_errors)}")    logger.info("👋 Gemup Marketplace API stopped")def create_application() -> FastAPI:    """    Создание и настройка экземпляра FastAPI приложения.    Returns:        FastAPI: Настроенное приложение    """    # Создание приложения с конфигурацией    application = FastAPI(        title=settings.app_name,        version=settings.app_version,        description="API маркетплейса прокси-серверов для Web3 проектов",        # Документация        #docs_url=getattr(settings, 'effective_docs_url', '/docs'),        #redoc_url=getattr(settings, 'effective_redoc_url', '/redoc'),        #openapi_url="/openapi.json" if not settings.is_production() else None,        docs_url="/docs",        redoc_url="/redoc",        openapi_url="/openapi.json",        # Настройки        debug=settings.debug,        lifespan=lifespan,        # Метаданные        contact={            "name": "Gemup Support",            "email": "support@gemup.com",            "url": "https://gemup.com/support"        },        license_info={            "name": "Proprietary",            "url": "https://gemup.com/license"        },        # OpenAPI теги        openapi_tags=[            {                "name": "Authentication",                "description": "Операции аутентификации и авторизации"            },            {                "name": "Users",                "description": "Управление пользователями"            },            {                "name": "Products",                "description": "Каталог продуктов прокси"            },            {                "name": "Cart",                "description": "Корзина покупок"            },            {                "name": "Orders",                "description": "Управление заказами"            },            {                "name": "Payments",                "description": "Платежи и транзакции"            },            {                "name": "Proxies",                "description": "Управление купленными прокси"            }        ]    )    return application# Создание экземпляра приложенияapp = create_application()# Настройка middlewaresetup_middleware(app)# Настройка обработчиков ошибокsetup_error_handlers(app)def get_app_state_data(key: str, default=None):    """    Безопасное получение данных из app.state.    Args:        key: Ключ для получения        default: Значение по умолчанию    Returns:        Значение из state или default    """    try:        if hasattr(app, 'state') and hasattr(app.state, key):            return getattr(app.state, key)        return default    except Exception:        return default@app.get("/", tags=["System"])async def root() -> Dict[str, Any]:    """    Корневой endpoint приложения.    Возвращает основную информацию о API.    Returns:        Dict: Информация о приложении    """    global request_count    request_count += 1    uptime_seconds = int((datetime.now() - app_start_time).total_seconds())    return {        "message": "Gemup Marketplace API",        "app": settings.app_name,        "version": settings.app_version,        "status": "running",        "environment": settings.environment,        "uptime_seconds": uptime_seconds,        "docs_url": getattr(settings, 'effective_docs_url', '/docs'),        "api_prefix": settings.api_prefix    }@app.get("/health", tags=["System"])async def health_check() -> Dict[str, Any]:    """    Проверка состояния системы.    Выполняет проверку всех критических компонентов.    Returns:        Dict: Статус здоровья системы    """    # Проверка компонентов    db_status = await check_db_health()    redis_status = await get_redis_health()    # Общий статус    overall_status = "healthy" if (db_status and redis_status) else "degraded"    if not db_status:        overall_status = "unhealthy"    # Время работы    uptime_seconds = int((datetime.now() - app_start_time).total_seconds())    # Базовые метрики    health_data = {        "status": overall_status,        "timestamp": datetime.now().isoformat(),        "uptime_seconds": uptime_seconds,        "environment": settings.environment,        "version": settings.app_version,        # Статус компонентов        "components": {            "database": "healthy" if db_status else "unhealthy",            "redis": "healthy" if redis_status else "unhealthy",            "application": "healthy"        },        # Статистика        "metrics": {            "total_requests": request_count,            "total_errors": error_count,            "enabled_providers": getattr(settings, 'get_enabled_proxy_providers', lambda: [])()        }    }    startup_data = {        "completed_tasks": get_app_state_data("startup_tasks", startup_tasks),        "errors": get_app_state_data("startup_errors", startup_errors),        "startup_time": get_app_state_data("startup_time", app_start_time).isoformat()    }    health_data["startup"] = startup_data    return health_data@app.get("/metrics", tags=["System"])async def metrics() -> Dict[str, Any]:    """    Получение метрик приложения.    Returns:        Dict: Метрики производительности и использования    """    try:        import psutil        import os        # Системные метрики        process = psutil.Process(os.getpid())        memory_info = process.memory_info()        metrics_data = {            "timestamp": datetime.now().isoformat(),            "uptime_seconds": int((datetime.now() - app_start_time).total_seconds()),            # Системные метрики            "system": {                "cpu_percent": process.cpu_percent(),                "memory_rss_mb": round(memory_info.rss / 1024 / 1024, 2),                "memory_vms_mb": round(memory_info.vms / 1024 / 1024, 2),                "open_files": len(process.open_files()),                "threads": process.num_threads()            },            # Метрики приложения            "application": {                "total_requests": request_count,                "total_errors": error_count,                "error_rate": round((error_count / max(request_count, 1)) * 100, 2)            },            # Базовая информация о БД            "database": {                "status": "connected" if await check_db_health() else "disconnected"            },            # Конфигурация            "config": {                "environment": settings.environment,                "debug": settings.debug,                "enabled_providers": getattr(settings, 'get_enabled_proxy_providers', lambda: [])()            }        }        return metrics_data    except ImportError:        # psutil недоступен        logger.warning("psutil not available, returning basic metrics")        return {            "timestamp": datetime.now().isoformat(),            "uptime_seconds": int((datetime.now() - app_start_time).total_seconds()),            "application": {                "total_requests": request_count,                "total_errors": error_count,                "error_rate": round((error_count / max(request_count, 1)) * 100, 2)            },            "system": {                "message": "System metrics unavailable (psutil not installed)"            }        }    except Exception as metrics_error:        logger.error(f"Error collecting metrics: {metrics_error}")        return {            "error": "Failed to collect metrics",            "timestamp": datetime.now().isoformat(),            "details": str(metrics_error)        }@app.get("/version", tags=["System"])async def version_info() -> Dict[str, Any]:    """    Информация о версии API.    Returns:        Dict: Детальная информация о версии    """    import sys    return {        "app_name": settings.app_name,        "version": settings.app_version,        "environment": settings.environment,        "build_date": app_start_time.isoformat(),        "python_version": f"{sys.version_info.major}.{sys.version_info.minor}.{sys.version_info.micro}",        "api_prefix": settings.api_prefix,        "features": [            "Authentication",            "User Management",            "Product Catalog",            "Shopping Cart",            "Order Processing",            "Payment Integration",            "Proxy Management"        ]    }# === ПОДКЛЮЧЕНИЕ РОУТЕРОВ ===# Подключаем все роутеры с единым префиксомapp.include_router(auth.router, prefix=settings.api_prefix, tags=["Authentication"])app.include_router(users.router, prefix=settings.api_prefix, tags=["Users"])app.include_router(products.router, prefix=settings.api_prefix, tags=["Products"])app.include_router(cart.router, prefix=settings.api_prefix, tags=["Cart"])app.include_router(orders.router, prefix=settings.api_prefix, tags=["Orders"])app.include_router(payments.router, prefix=settings.api_prefix, tags=["Payments"])app.include_router(proxies.router, prefix=settings.api_prefix, tags=["Proxies"])logger.info("✅ All routers configured")# === ДОПОЛНИТЕЛЬНЫЕ MIDDLEWARE ===@app.middleware("http")async def add_metrics_middleware(request: Request, call_next):    """Middleware для сбора метрик запросов."""    global request_count, error_count    request_count += 1    try:        response = await call_next(request)        # Считаем ошибки        if response.status_code >= 400:            error_count += 1        return response    except Exception:        error_count += 1        raise# === EVENT HANDLERS ===@app.exception_handler(404)async def not_found_handler(request: Request, _: StarletteHTTPException):    """Кастомный обработчик 404 ошибок."""    return JSONResponse(        status_code=404,        content={            "error": True,            "message": "Endpoint not found",            "code": "NOT_FOUND",            "path": str(request.url.path),            "available_endpoints": [                f"{settings.api_prefix}/auth",                f"{settings.api_prefix}/users",                f"{settings.api_prefix}/products",                f"{settings.api_prefix}/cart",                f"{settings.api_prefix}/orders",                f"{settings.api_prefix}/payments",                f"{settings.api_prefix}/proxies"            ]        }    )if __name__ == "__main__":    # Для запуска в development режиме не в контейнере    import uvicorn    uvicorn.run(        "app.core.main:app",        host="0.0.0.0",        port=8080,        reload=True,        log_level="info"    )
\ No newline at end of file
+"""Главный модуль приложения FastAPI.Настройка и инициализация всех компонентов приложения:- Конфигурация FastAPI- Подключение middleware и роутов- Настройка lifecycle events- Health checks и мониторинг"""import loggingfrom contextlib import asynccontextmanagerfrom datetime import datetimefrom typing import Dict, Anyfrom fastapi import FastAPI, Requestfrom fastapi.responses import JSONResponsefrom starlette.exceptions import HTTPException as StarletteHTTPExceptionfrom app.core.config import settingsfrom app.core.db import close_db, check_db_healthfrom app.core.logging_config import setup_loggingfrom app.core.middleware import setup_middleware, setup_error_handlersfrom app.core.migrations import init_alembicfrom app.core.redis import redis_client, get_redis_healthfrom app.integrations import start_integrations, close_integrationsfrom app.api.v1 import (    auth,    users,    products,    cart,    orders,    payments,    proxies)# Настройка логированияsetup_logging()logger = logging.getLogger(__name__)# Глобальные переменные для метрикapp_start_time = datetime.now()request_count = 0error_count = 0startup_tasks: list = []startup_errors: list = []@asynccontextmanagerasync def lifespan(application: FastAPI):    """    Управление жизненным циклом приложения.    Выполняет инициализацию при старте и очистке при завершении.    Args:        application: Экземпляр FastAPI приложения    """    global startup_tasks, startup_errors  # ИСПРАВЛЕНО: используем глобальные переменные    # === STARTUP ===    logger.info("🚀 Starting Gemup Marketplace API...")    logger.info(f"📊 Environment: {settings.environment}")    logger.info(f"📊 Debug mode: {settings.debug}")    logger.info(f"📊 Version: {settings.app_version}")    startup_tasks = []    startup_errors = []    try:        # 1. Проверка подключения к БД        logger.info("🔄 Checking database connection...")        db_healthy = await check_db_health()        if db_healthy:            logger.info("✅ Database connection established")            startup_tasks.append("Database")        else:            logger.error("❌ Database connection failed")            startup_errors.append("Database connection failed")    except Exception as db_error:        logger.error(f"❌ Database initialization error: {db_error}")        startup_errors.append(f"Database: {str(db_error)}")    try:        # 2. Подключение к Redis        logger.info("🔄 Connecting to Redis...")        await redis_client.connect()        redis_healthy = await get_redis_health()        if redis_healthy:            logger.info("✅ Redis connection established")            startup_tasks.append("Redis")        else:            logger.warning("⚠️ Redis connection failed, continuing without cache")            startup_errors.append("Redis connection failed")    except Exception as redis_error:        logger.error(f"❌ Redis connection error: {redis_error}")        startup_errors.append(f"Redis: {str(redis_error)}")    try:        # 3. Выполнение миграций (неблокирующее)        if settings.environment != "test":            logger.info("🔄 Running database migrations...")            await init_alembic()            logger.info("✅ Database migrations completed")            startup_tasks.append("Migrations")    except Exception as migration_error:        logger.warning(f"⚠️ Migration error (non-critical): {migration_error}")        startup_errors.append(f"Migrations: {str(migration_error)}")    try:        # 4. HTTP сессии внешних интеграций - один пул соединений на приложение        logger.info("🔄 Opening integration HTTP sessions...")        await start_integrations()        logger.info("✅ Integration HTTP sessions opened")        startup_tasks.append("Integrations")    except Exception as integrations_error:        logger.error(f"❌ Integration sessions error: {integrations_error}")        startup_errors.append(f"Integrations: {str(integrations_error)}")    # 5. Дополнительная инициализация    try:        # Очистка просроченных сессий        if hasattr(redis_client, 'redis') and redis_client.redis:            if hasattr(redis_client, 'cleanup_expired_sessions'):                cleaned = await redis_client.cleanup_expired_sessions()                logger.info(f"🧹 Cleaned {cleaned} expired sessions")        # Проверка настроек        if hasattr(settings, 'validate_required_settings'):            missing_settings = settings.validate_required_settings()            if missing_settings:                logger.warning(f"⚠️ Missing settings: {', '.join(missing_settings)}")                startup_errors.extend(missing_settings)    except Exception as init_error:        logger.error(f"❌ Additional initialization error: {init_error}")        startup_errors.append(f"Additional init: {str(init_error)}")    # Логируем результаты запуска    logger.info(f"✅ Startup completed. Tasks: {', '.join(startup_tasks)}")    if startup_errors:        logger.warning(f"⚠️ Startup warnings: {', '.join(startup_errors)}")    # ИСПРАВЛЕНО: Безопасное сохранение в state    try:        # Инициализируем state если нужно        if not hasattr(application, 'state'):            from starlette.datastructures import State            application.state = State()        application.state.startup_time = app_start_time        application.state.startup_tasks = startup_tasks.copy()        application.state.startup_errors = startup_errors.copy()    except Exception as state_error:        logger.warning(f"Could not save to app.state: {state_error}")    logger.info("🎉 Gemup Marketplace API is ready!")    yield    # === SHUTDOWN ===    logger.info("🛑 Shutting down Gemup Marketplace API...")    shutdown_tasks = []    shutdown_errors = []    try:        # 1. Закрытие соединений с БД        logger.info("🔄 Closing database connections...")        await close_db()        logger.info("✅ Database connections closed")        shutdown_tasks.append("Database")    except Exception as db_shutdown_error:        logger.error(f"❌ Database shutdown error: {db_shutdown_error}")        shutdown_errors.append(f"Database: {str(db_shutdown_error)}")    try:        # 2. Отключение от Redis        logger.info("🔄 Disconnecting from Redis...")        await redis_client.disconnect()        logger.info("✅ Redis disconnected")        shutdown_tasks.append("Redis")    except Exception as redis_shutdown_error:        logger.error(f"❌ Redis shutdown error: {redis_shutdown_error}")        shutdown_errors.append(f"Redis: {str(redis_shutdown_error)}")    try:        # 3. Закрытие HTTP сессий внешних интеграций        logger.info("🔄 Closing integration HTTP sessions...")        await close_integrations()        logger.info("✅ Integration HTTP sessions closed")        shutdown_tasks.append("Integrations")    except Exception as integrations_shutdown_error:        logger.error(f"❌ Integration sessions shutdown error: {integrations_shutdown_error}")        shutdown_errors.append(f"Integrations: {str(integrations_shutdown_error)}")    # Логируем результаты завершения    logger.info(f"✅ Shutdown completed. Tasks: {', '.join(shutdown_tasks)}")    if shutdown_errors:        logger.warning(f"⚠️ Shutdown warnings: {', '.join(shutdown_errors)}")    logger.info("👋 Gemup Marketplace API stopped")def create_application() -> FastAPI:    """    Создание и настройка экземпляра FastAPI приложения.    Returns:        FastAPI: Настроенное приложение    """    # Создание приложения с конфигурацией    application = FastAPI(        title=settings.app_name,        version=settings.app_version,        description="API маркетплейса прокси-серверов для Web3 проектов",        # Документация        #docs_url=getattr(settings, 'effective_docs_url', '/docs'),        #redoc_url=getattr(settings, 'effective_redoc_url', '/redoc'),        #openapi_url="/openapi.json" if not settings.is_production() else None,        docs_url="/docs",        redoc_url="/redoc",        openapi_url="/openapi.json",        # Настройки        debug=settings.debug,        lifespan=lifespan,        # Метаданные        contact={            "name": "Gemup Support",            "email": "support@gemup.com",            "url": "https://gemup.com/support"        },        license_info={            "name": "Proprietary",            "url": "https://gemup.com/license"        },        # OpenAPI теги        openapi_tags=[            {                "name": "Authentication",                "description": "Операции аутентификации и авторизации"            },            {                "name": "Users",                "description": "Управление пользователями"            },            {                "name": "Products",                "description": "Каталог продуктов прокси"            },            {                "name": "Cart",                "description": "Корзина покупок"            },            {                "name": "Orders",                "description": "Управление заказами"            },            {                "name": "Payments",                "description": "Платежи и транзакции"            },            {                "name": "Proxies",                "description": "Управление купленными прокси"            }        ]    )    return application# Создание экземпляра приложенияapp = create_application()# Настройка middlewaresetup_middleware(app)# Настройка обработчиков ошибокsetup_error_handlers(app)def get_app_state_data(key: str, default=None):    """    Безопасное получение данных из app.state.    Args:        key: Ключ для получения        default: Значение по умолчанию    Returns:        Значение из state или default    """    try:        if hasattr(app, 'state') and hasattr(app.state, key):            return getattr(app.state, key)        return default    except Exception:        return default@app.get("/", tags=["System"])async def root() -> Dict[str, Any]:    """    Корневой endpoint приложения.    Возвращает основную информацию о API.    Returns:        Dict: Информация о приложении    """    global request_count    request_count += 1    uptime_seconds = int((datetime.now() - app_start_time).total_seconds())    return {        "message": "Gemup Marketplace API",        "app": settings.app_name,        "version": settings.app_version,        "status": "running",        "environment": settings.environment,        "uptime_seconds": uptime_seconds,        "docs_url": getattr(settings, 'effective_docs_url', '/docs'),        "api_prefix": settings.api_prefix    }@app.get("/health", tags=["System"])async def health_check() -> Dict[str, Any]:    """    Проверка состояния системы.    Выполняет проверку всех критических компонентов.    Returns:        Dict: Статус здоровья системы    """    # Проверка компонентов    db_status = await check_db_health()    redis_status = await get_redis_health()    # Общий статус    overall_status = "healthy" if (db_status and redis_status) else "degraded"    if not db_status:        overall_status = "unhealthy"    # Время работы    uptime_seconds = int((datetime.now() - app_start_time).total_seconds())    # Базовые метрики    health_data = {        "status": overall_status,        "timestamp": datetime.now().isoformat(),        "uptime_seconds": uptime_seconds,        "environment": settings.environment,        "version": settings.app_version,        # Статус компонентов        "components": {            "database": "healthy" if db_status else "unhealthy",            "redis": "healthy" if redis_status else "unhealthy",            "application": "healthy"        },        # Статистика        "metrics": {            "total_requests": request_count,            "total_errors": error_count,            "enabled_providers": getattr(settings, 'get_enabled_proxy_providers', lambda: [])()        }    }    startup_data = {        "completed_tasks": get_app_state_data("startup_tasks", startup_tasks),        "errors": get_app_state_data("startup_errors", startup_errors),        "startup_time": get_app_state_data("startup_time", app_start_time).isoformat()    }    health_data["startup"] = startup_data    return health_data@app.get("/metrics", tags=["System"])async def metrics() -> Dict[str, Any]:    """    Получение метрик приложения.    Returns:        Dict: Метрики производительности и использования    """    try:        import psutil        import os        # Системные метрики        process = psutil.Process(os.getpid())        memory_info = process.memory_info()        metrics_data = {            "timestamp": datetime.now().isoformat(),            "uptime_seconds": int((datetime.now() - app_start_time).total_seconds()),            # Системные метрики            "system": {                "cpu_percent": process.cpu_percent(),                "memory_rss_mb": round(memory_info.rss / 1024 / 1024, 2),                "memory_vms_mb": round(memory_info.vms / 1024 / 1024, 2),                "open_files": len(process.open_files()),                "threads": process.num_threads()            },            # Метрики приложения            "application": {                "total_requests": request_count,                "total_errors": error_count,                "error_rate": round((error_count / max(request_count, 1)) * 100, 2)            },            # Базовая информация о БД            "database": {                "status": "connected" if await check_db_health() else "disconnected"            },            # Конфигурация            "config": {                "environment": settings.environment,                "debug": settings.debug,                "enabled_providers": getattr(settings, 'get_enabled_proxy_providers', lambda: [])()            }        }        return metrics_data    except ImportError:        # psutil недоступен        logger.warning("psutil not available, returning basic metrics")        return {            "timestamp": datetime.now().isoformat(),            "uptime_seconds": int((datetime.now() - app_start_time).total_seconds()),            "application": {                "total_requests": request_count,                "total_errors": error_count,                "error_rate": round((error_count / max(request_count, 1)) * 100, 2)            },            "system": {                "message": "System metrics unavailable (psutil not installed)"            }        }    except Exception as metrics_error:        logger.error(f"Error collecting metrics: {metrics_error}")        return {            "error": "Failed to collect metrics",            "timestamp": datetime.now().isoformat(),            "details": str(metrics_error)        }@app.get("/version", tags=["System"])async def version_info() -> Dict[str, Any]:    """    Информация о версии API.    Returns:        Dict: Детальная информация о версии    """    import sys    return {        "app_name": settings.app_name,        "version": settings.app_version,        "environment": settings.environment,        "build_date": app_start_time.isoformat(),        "python_version": f"{sys.version_info.major}.{sys.version_info.minor}.{sys.version_info.micro}",        "api_prefix": settings.api_prefix,        "features": [            "Authentication",            "User Management",            "Product Catalog",            "Shopping Cart",            "Order Processing",            "Payment Integration",            "Proxy Management"        ]    }# === ПОДКЛЮЧЕНИЕ РОУТЕРОВ ===# Подключаем все роутеры с единым префиксомapp.include_router(auth.router, prefix=settings.api_prefix, tags=["Authentication"])app.include_router(users.router, prefix=settings.api_prefix, tags=["Users"])app.include_router(products.router, prefix=settings.api_prefix, tags=["Products"])app.include_router(cart.router, prefix=settings.api_prefix, tags=["Cart"])app.include_router(orders.router, prefix=settings.api_prefix, tags=["Orders"])app.include_router(payments.router, prefix=settings.api_prefix, tags=["Payments"])app.include_router(proxies.router, prefix=settings.api_prefix, tags=["Proxies"])logger.info("✅ All routers configured")# === ДОПОЛНИТЕЛЬНЫЕ MIDDLEWARE ===@app.middleware("http")async def add_metrics_middleware(request: Request, call_next):    """Middleware для сбора метрик запросов."""    global request_count, error_count    request_count += 1    try:        response = await call_next(request)        # Считаем ошибки        if response.status_code >= 400:            error_count += 1        return response    except Exception:        error_count += 1        raise# === EVENT HANDLERS ===@app.exception_handler(404)async def not_found_handler(request: Request, _: StarletteHTTPException):    """Кастомный обработчик 404 ошибок."""    return JSONResponse(        status_code=404,        content={            "error": True,            "message": "Endpoint not found",            "code": "NOT_FOUND",            "path": str(request.url.path),            "available_endpoints": [                f"{settings.api_prefix}/auth",                f"{settings.api_prefix}/users",                f"{settings.api_prefix}/products",                f"{settings.api_prefix}/cart",                f"{settings.api_prefix}/orders",                f"{settings.api_prefix}/payments",                f"{settings.api_prefix}/proxies"            ]        }    )if __name__ == "__main__":    # Для запуска в development режиме не в контейнере    import uvicorn    uvicorn.run(        "app.core.main:app",        host="0.0.0.0",        port=8080,        reload=True,        log_level="info"    )
\ No newline at end of file
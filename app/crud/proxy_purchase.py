@@ -10,7 +10,7 @@ from datetime import datetime, timedelta, timezone
 from decimal import Decimal
 from typing import List, Optional, Dict, Any
 
-from sqlalchemy import select, and_, func, desc
+from sqlalchemy import select, insert, and_, func, desc
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
@@ -119,6 +119,84 @@ class CRUDProxyPurchase(CRUDBase[ProxyPurchase, ProxyPurchaseCreate, ProxyPurcha
             logger.error(f"Error creating proxy purchase: {e}")
             return None
 
+    async def create_purchases_bulk(
+        self,
+        db: AsyncSession,
+        *,
+        purchases: List[Dict[str, Any]]
+    ) -> int:
+        """
+        Массовое создание покупок одним INSERT (executemany).
+
+        Проверки те же, что в create_purchase: срок действия в будущем,
+        пользователь, продукт и заказ существуют. Существование проверяется
+        одним запросом на таблицу для всех строк.
+
+        Args:
+            db: Сессия базы данных
+            purchases: Поля покупок - user_id, proxy_product_id, order_id,
+                proxy_list, expires_at и опциональные данные провайдера
+
+        Returns:
+            int: Количество созданных покупок
+
+        Raises:
+            ValueError: При невалидных данных покупки
+            Exception: При ошибке вставки - транзакция откатывается
+        """
+        if not purchases:
+            return 0
+
+        try:
+            now = datetime.now(timezone.utc)
+
+            # Валидация входных данных
+            for purchase in purchases:
+                if purchase["expires_at"] <= now:
+                    logger.warning(f"Invalid expiry date for purchase: {purchase['expires_at']}")
+                    raise ValueError("Expiry date must be in the future")
+
+            # Проверяем существование пользователей, продуктов и заказов
+            for model, key, error in (
+                (User, "user_id", "User not found"),
+                (ProxyProduct, "proxy_product_id", "Product not found"),
+                (Order, "order_id", "Order not found"),
+            ):
+                ids = {purchase[key] for purchase in purchases}
+                found = await db.scalars(select(model.id).where(model.id.in_(ids)))
+                if ids - set(found.all()):
+                    raise ValueError(error)
+
+            rows = []
+            for purchase in purchases:
+                proxy_list = purchase["proxy_list"]
+                # Если proxy_list это список, преобразуем в строку
+                if isinstance(proxy_list, list):
+                    proxy_list = "\n".join(str(proxy) for proxy in proxy_list)
+
+                rows.append({
+                    **purchase,
+                    "proxy_list": proxy_list,
+                    "is_active": True,
+                    "traffic_used_gb": Decimal('0.00000000'),
+                    "created_at": now,
+                    "updated_at": now
+                })
+
+            await db.execute(insert(ProxyPurchase), rows)
+            await db.commit()
+
+            logger.info(f"Created {len(rows)} proxy purchases")
+            return len(rows)
+
+        except ValueError:
+            await db.rollback()
+            raise
+        except Exception as e:
+            await db.rollback()
+            logger.error(f"Error creating proxy purchases: {e}")
+            raise
+
     async def get_user_purchase(
         self,
         db: AsyncSession,
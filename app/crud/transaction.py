@@ -11,7 +11,7 @@ from datetime import datetime, timedelta, timezone
 from decimal import Decimal
 from typing import List, Optional, Dict, Any
 
-from sqlalchemy import select, and_, func, desc, update, or_
+from sqlalchemy import select, and_, func, desc, update, or_, insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
@@ -30,6 +30,25 @@ class CRUDTransaction(CRUDBase[Transaction, TransactionCreate, TransactionUpdate
     включая пополнения баланса через Cryptomus и покупки.
     """
 
+    async def _insert_transaction(self, db: AsyncSession, values: Dict[str, Any]) -> Transaction:
+        """
+        Вставка транзакции через INSERT ... RETURNING.
+
+        Созданная строка возвращается тем же запросом, поэтому
+        после commit не нужен отдельный SELECT через refresh.
+
+        Args:
+            db: Сессия базы данных
+            values: Значения колонок транзакции
+
+        Returns:
+            Transaction: Созданная транзакция
+        """
+        result = await db.scalars(insert(Transaction).returning(Transaction), [values])
+        transaction = result.one()
+        await db.commit()
+        return transaction
+
     async def create_balance_topup(
         self,
         db: AsyncSession,
@@ -63,22 +82,18 @@ class CRUDTransaction(CRUDBase[Transaction, TransactionCreate, TransactionUpdate
             if not user:
                 raise ValueError("User not found")
 
-            transaction = Transaction(
-                user_id=user_id,
-                amount=amount,
-                currency="USD",
-                transaction_type=TransactionType.BALANCE_TOPUP,
-                status=TransactionStatus.PENDING,
-                payment_method=payment_method,
-                provider_payment_id=provider_payment_id,
-                description=description or f"Balance topup via {payment_method}",
-                created_at=datetime.now(timezone.utc),
-                updated_at=datetime.now(timezone.utc)
-            )
-
-            db.add(transaction)
-            await db.commit()
-            await db.refresh(transaction)
+            transaction = await self._insert_transaction(db, {
+                "user_id": user_id,
+                "amount": amount,
+                "currency": "USD",
+                "transaction_type": TransactionType.BALANCE_TOPUP,
+                "status": TransactionStatus.PENDING,
+                "payment_method": payment_method,
+                "provider_payment_id": provider_payment_id,
+                "description": description or f"Balance topup via {payment_method}",
+                "created_at": datetime.now(timezone.utc),
+                "updated_at": datetime.now(timezone.utc)
+            })
 
             logger.info(f"Created balance topup transaction {transaction.id} for user {user_id}: {amount}")
             return transaction
@@ -127,23 +142,19 @@ class CRUDTransaction(CRUDBase[Transaction, TransactionCreate, TransactionUpdate
                 raise ValueError("Order not found")
 
             # Для покупок сумма отрицательная
-            transaction = Transaction(
-                user_id=user_id,
-                order_id=order_id,
-                amount=-amount,  # Отрицательная для списания
-                currency="USD",
-                transaction_type=TransactionType.PURCHASE,
-                status=TransactionStatus.COMPLETED,  # Покупки сразу завершены
-                payment_method=payment_method,
-                description=f"Purchase for order {order.order_number}",
-                processed_at=datetime.now(timezone.utc),
-                created_at=datetime.now(timezone.utc),
-                updated_at=datetime.now(timezone.utc)
-            )
-
-            db.add(transaction)
-            await db.commit()
-            await db.refresh(transaction)
+            transaction = await self._insert_transaction(db, {
+                "user_id": user_id,
+                "order_id": order_id,
+                "amount": -amount,  # Отрицательная для списания
+                "currency": "USD",
+                "transaction_type": TransactionType.PURCHASE,
+                "status": TransactionStatus.COMPLETED,  # Покупки сразу завершены
+                "payment_method": payment_method,
+                "description": f"Purchase for order {order.order_number}",
+                "processed_at": datetime.now(timezone.utc),
+                "created_at": datetime.now(timezone.utc),
+                "updated_at": datetime.now(timezone.utc)
+            })
 
             logger.info(f"Created purchase transaction {transaction.id} for order {order_id}: {amount}")
             return transaction
@@ -15,6 +15,7 @@ import bcrypt
 from sqlalchemy import select, and_, update, or_, func, desc
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.config import settings
 from app.crud.base import CRUDBase
 from app.models.models import User, UserRole, Order, Transaction, ProxyPurchase
 from app.schemas.user import UserCreate, UserUpdate
@@ -45,7 +46,7 @@ class PasswordManager:
             raise ValueError("Password cannot be empty")
 
         password_bytes = password.encode('utf-8')
-        salt = bcrypt.gensalt(rounds=12)  # Enhanced security
+        salt = bcrypt.gensalt(rounds=settings.bcrypt_rounds)
         hashed_bytes = bcrypt.hashpw(password_bytes, salt)
         return hashed_bytes.decode('utf-8')
 
@@ -63,6 +63,23 @@ def get_payment_provider(provider_name: str) -> BaseIntegration:
     return PAYMENT_PROVIDERS[provider_name]
 
 
+async def start_integrations() -> None:
+    """
+    Открытие HTTP сессий всех интеграций при старте приложения.
+
+    Каждая интеграция держит один пул соединений на всё время жизни
+    приложения, поэтому первый запрос к провайдеру не создает его заново.
+    """
+    for provider in (*PROXY_PROVIDERS.values(), *PAYMENT_PROVIDERS.values()):
+        await provider._ensure_session()
+
+
+async def close_integrations() -> None:
+    """Закрытие HTTP сессий всех интеграций при остановке приложения."""
+    for provider in (*PROXY_PROVIDERS.values(), *PAYMENT_PROVIDERS.values()):
+        await provider.close()
+
+
 async def test_all_integrations() -> Dict[str, Dict[str, Any]]:
     """
     Тестирование всех интеграций - для проверки MVP.
@@ -145,6 +162,8 @@ __all__ = [
     "cryptomus_api",
     "get_proxy_provider",
     "get_payment_provider",
+    "start_integrations",
+    "close_integrations",
     "test_all_integrations",
     "get_integration_status",
     "PROXY_PROVIDERS",
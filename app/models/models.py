@@ -286,6 +286,7 @@ class ProxyProduct(Base):
         CheckConstraint('stock_available >= 0', name='non_negative_stock'),
         Index('idx_product_category_country', 'proxy_category', 'country_code'),
         Index('idx_product_active_featured', 'is_active', 'is_featured'),
+        Index('idx_product_active_id', 'is_active', 'id'),
         Index('idx_product_provider', 'provider', 'provider_product_id'),
     )
 
@@ -121,6 +121,7 @@ class ProxyProductPublic(BaseModel):
 
 class ProductFilter(BaseModel):
     """Схема фильтрации продуктов."""
+    ids: Optional[List[int]] = Field(None, description="ID продуктов")
     search: Optional[str] = Field(None, description="Поиск по названию")
     proxy_category: Optional[ProxyCategory] = Field(None, description="Категория прокси")
     proxy_type: Optional[ProxyType] = Field(None, description="Тип прокси")
@@ -248,6 +249,24 @@ class ProductBulkUpdateResponse(BaseModel):
     operation: str = Field(..., description="Выполненная операция")
 
 
+class ProductBatchQuery(BaseModel):
+    """Один GET-запрос каталога внутри пакета."""
+    path: str = Field(..., description="Путь относительно /products, например /")
+    params: Dict[str, Any] = Field(default_factory=dict, description="Query-параметры запроса")
+
+
+class ProductBatchRequest(BaseModel):
+    """Пакет запросов каталога, выполняемых за один HTTP-вызов."""
+    queries: List[ProductBatchQuery] = Field(..., min_length=1, max_length=50, description="Запросы пакета")
+
+
+class ProductBatchResult(BaseModel):
+    """Результат одного запроса пакета."""
+    path: str = Field(..., description="Путь запроса")
+    status_code: int = Field(..., description="HTTP статус, который вернул бы отдельный запрос")
+    body: Any = Field(None, description="Тело ответа")
+
+
 class ProductStatsResponse(BaseModel):
     """Общая статистика продуктов."""
     total_products: int = Field(..., description="Общее количество продуктов")
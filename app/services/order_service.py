@@ -9,12 +9,13 @@ import logging
 import uuid
 from datetime import datetime, timedelta, timezone
 from decimal import Decimal
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.exceptions import BusinessLogicError
 from app.crud.order import order_crud
+from app.crud.proxy_product import proxy_product_crud
 from app.crud.proxy_purchase import proxy_purchase_crud
 from app.crud.user import user_crud
 from app.integrations import get_proxy_provider, IntegrationError
@@ -146,6 +147,19 @@ class OrderService(BaseService[Order, OrderCreate, OrderUpdate]):
                     f"Insufficient balance. Required: {total_amount}, Available: {user.balance}"
                 )
 
+            # Резервирование остатков до оплаты: заказ, которому не хватило
+            # остатка, откатывает уже сделанные резервы и не создается
+            for cart_item in cart_items:
+                reserved = await proxy_product_crud.reserve_stock(
+                    db,
+                    product_id=cart_item.proxy_product_id,
+                    quantity=cart_item.quantity
+                )
+                if not reserved:
+                    product_id = cart_item.proxy_product_id
+                    await db.rollback()
+                    raise BusinessLogicError(f"Insufficient stock for product {product_id}")
+
             # Создание заказа
             order_number = self._generate_order_number()
             order_data = OrderCreate(
@@ -163,13 +177,8 @@ class OrderService(BaseService[Order, OrderCreate, OrderUpdate]):
             if not user.is_guest:
                 await self._process_balance_payment(db, user, order, total_amount)
 
-            # Создание покупок прокси
-            for cart_item in cart_items:
-                try:
-                    await self._create_proxy_purchase(db, order, cart_item)
-                except Exception as e:
-                    logger.error(f"Failed to create proxy purchase for cart item {cart_item.id}: {e}")
-                    # Продолжаем обработку других элементов
+            # Создание покупок прокси - все позиции корзины одним INSERT
+            await self._create_order_purchases(db, order, cart_items)
 
             # Очистка корзины
             await cart_service.clear_cart(
@@ -515,39 +524,77 @@ class OrderService(BaseService[Order, OrderCreate, OrderUpdate]):
             return 0
 
     # Приватные методы
-    async def _create_proxy_purchase(self, db: AsyncSession, order: Order, cart_item) -> None:
+    async def _prepare_proxy_purchase(self, order: Order, cart_item) -> Dict[str, Any]:
         """
-        Создание покупки прокси через интеграцию с провайдерами.
+        Покупка прокси у провайдера и подготовка данных покупки.
 
         Args:
-            db: Сессия базы данных
             order: Заказ
             cart_item: Элемент корзины
+
+        Returns:
+            Dict[str, Any]: Поля ProxyPurchase для массовой вставки
         """
-        try:
-            # РЕАЛЬНАЯ интеграция с провайдерами
-            proxy_data = await self._purchase_proxies_from_provider(cart_item)
+        # РЕАЛЬНАЯ интеграция с провайдерами
+        proxy_data = await self._purchase_proxies_from_provider(cart_item)
 
-            # Рассчитываем дату истечения
-            duration_days = getattr(cart_item.proxy_product, 'duration_days', 30)
-            expires_at = datetime.now(timezone.utc) + timedelta(days=duration_days)
+        # Рассчитываем дату истечения
+        duration_days = getattr(cart_item.proxy_product, 'duration_days', 30)
+        expires_at = datetime.now(timezone.utc) + timedelta(days=duration_days)
 
-            await proxy_purchase_crud.create_purchase(
-                db,
-                user_id=order.user_id,
-                proxy_product_id=cart_item.proxy_product_id,
-                order_id=order.id,
-                proxy_list=proxy_data["proxy_list"],
-                username=proxy_data.get("username"),
-                password=proxy_data.get("password"),
-                expires_at=expires_at,
-                provider_order_id=proxy_data.get("provider_order_id"),
-                provider_metadata=proxy_data.get("provider_metadata")
-            )
+        # Если proxy_list это список, преобразуем в строку
+        proxy_list = proxy_data["proxy_list"]
+        if isinstance(proxy_list, list):
+            proxy_list = "\n".join(str(proxy) for proxy in proxy_list)
+
+        return {
+            "user_id": order.user_id,
+            "proxy_product_id": cart_item.proxy_product_id,
+            "order_id": order.id,
+            "proxy_list": proxy_list,
+            "username": proxy_data.get("username"),
+            "password": proxy_data.get("password"),
+            "expires_at": expires_at,
+            "provider_order_id": proxy_data.get("provider_order_id"),
+            "provider_metadata": proxy_data.get("provider_metadata")
+        }
+
+    async def _create_order_purchases(self, db: AsyncSession, order: Order, cart_items: List[Any]) -> int:
+        """
+        Создание покупок прокси по позициям корзины одним INSERT.
+
+        Ошибка проверки или вставки покупок прерывает оформление заказа.
+        Оплата и резерв остатков к этому моменту уже зафиксированы, поэтому
+        средства и остатки возвращаются, а заказ переводится в FAILED.
+
+        Args:
+            db: Сессия базы данных
+            order: Созданный заказ
+            cart_items: Позиции корзины
+
+        Returns:
+            int: Количество созданных покупок
+
+        Raises:
+            BusinessLogicError: Если покупки не созданы
+        """
+        # Резервы для возврата: после отката атрибуты позиций корзины недоступны
+        reserved = [(cart_item.proxy_product_id, cart_item.quantity) for cart_item in cart_items]
+
+        purchases = []
+        for cart_item in cart_items:
+            try:
+                purchases.append(await self._prepare_proxy_purchase(order, cart_item))
+            except Exception as e:
+                logger.error(f"Failed to create proxy purchase for cart item {cart_item.id}: {e}")
+                # Продолжаем обработку других элементов
 
+        try:
+            return await proxy_purchase_crud.create_purchases_bulk(db, purchases=purchases)
         except Exception as e:
-            logger.error(f"Error creating proxy purchase: {e}")
-            raise
+            await self._fail_order(db, order, reserved)
+            logger.error(f"Failed to create proxy purchases for order {order.order_number}: {e}")
+            raise BusinessLogicError(f"Failed to create proxy purchases: {str(e)}")
 
     async def _purchase_proxies_from_provider(self, cart_item) -> Dict[str, Any]:
         """
@@ -626,7 +673,7 @@ class OrderService(BaseService[Order, OrderCreate, OrderUpdate]):
         """
         try:
             # Списание с баланса
-            await user_crud.update_balance(db, user=user, amount=-amount)
+            await user_crud.update_balance(db, db_user=user, amount=-amount)
 
             # Обновление статуса заказа
             await self.crud.update_status(
@@ -641,6 +688,36 @@ class OrderService(BaseService[Order, OrderCreate, OrderUpdate]):
             logger.error(f"Error processing balance payment: {e}")
             raise
 
+    async def _fail_order(
+        self,
+        db: AsyncSession,
+        order: Order,
+        reserved: List[Tuple[int, int]]
+    ) -> None:
+        """
+        Перевод заказа в FAILED с возвратом средств и остатков.
+
+        Args:
+            db: Сессия базы данных
+            order: Заказ, оформление которого не удалось
+            reserved: Пары (ID продукта, количество), списанные под заказ
+        """
+        # Откат в create_purchases_bulk сбрасывает загруженные атрибуты
+        await db.refresh(order)
+
+        if order.status == OrderStatus.PAID:
+            await self._process_refund(db, order)
+
+        for product_id, quantity in reserved:
+            await proxy_product_crud.update_stock(db, product_id=product_id, stock_change=quantity)
+
+        await self.crud.update_status(
+            db,
+            order=order,
+            status=OrderStatus.FAILED,
+            reason="Proxy purchases were not created"
+        )
+
     @staticmethod
     async def _process_refund(db: AsyncSession, order: Order) -> None:
         """
@@ -653,7 +730,7 @@ class OrderService(BaseService[Order, OrderCreate, OrderUpdate]):
         try:
             user = await user_crud.get(db, id=order.user_id)
             if user:
-                await user_crud.update_balance(db, user=user, amount=order.total_amount)
+                await user_crud.update_balance(db, db_user=user, amount=order.total_amount)
                 logger.info(f"Refund processed for order {order.order_number}: {order.total_amount}")
 
         except Exception as e:
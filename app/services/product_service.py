@@ -6,6 +6,7 @@
 """
 
 import logging
+import time
 from typing import List, Optional, Dict, Any, Tuple
 
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -120,6 +121,9 @@ class ProductService(BaseService[ProxyProduct, ProxyProductCreate, ProxyProductU
         self.crud = proxy_product_crud
         self.business_rules = ProductBusinessRules()
         self.cache_ttl = 300  # 5 минут кэша для списков продуктов
+        self.countries_cache_ttl = 60  # Список стран меняется только вместе с каталогом
+        # (истекает в, версия каталога proxy_product_crud, страны)
+        self._countries_cache: Optional[Tuple[float, int, List[Dict[str, Any]]]] = None
 
     async def get_products_with_filter(
         self,
@@ -127,7 +131,8 @@ class ProductService(BaseService[ProxyProduct, ProxyProductCreate, ProxyProductU
         *,
         filter_params: ProductFilter,
         skip: int = 0,
-        limit: int = 20
+        limit: int = 20,
+        after_id: Optional[int] = None
     ) -> Tuple[List[ProxyProduct], int]:
         """
         Получение продуктов с применением фильтров.
@@ -137,6 +142,7 @@ class ProductService(BaseService[ProxyProduct, ProxyProductCreate, ProxyProductU
             filter_params: Параметры фильтрации
             skip: Количество пропускаемых записей
             limit: Максимальное количество записей
+            after_id: Курсор keyset-пагинации (ID последнего продукта предыдущей страницы)
 
         Returns:
             Tuple[List[ProxyProduct], int]: Список продуктов и общее количество
@@ -152,7 +158,7 @@ class ProductService(BaseService[ProxyProduct, ProxyProductCreate, ProxyProductU
 
             # Получение продуктов с фильтрацией
             products = await self.crud.get_products_with_filter(
-                db, filter_params=filter_params, skip=skip, limit=limit
+                db, filter_params=filter_params, skip=skip, limit=limit, after_id=after_id
             )
 
             # Подсчет общего количества
@@ -378,6 +384,40 @@ class ProductService(BaseService[ProxyProduct, ProxyProductCreate, ProxyProductU
             logger.error(f"Error getting available countries: {e}")
             return []
 
+    async def get_available_countries_cached(self, db: AsyncSession) -> List[Dict[str, Any]]:
+        """
+        Список доступных стран с кэшем в памяти процесса.
+
+        Одинаков для всех запросов, поэтому GROUP BY по каталогу выполняется
+        не чаще раза в countries_cache_ttl секунд. Кэш сбрасывается, когда
+        proxy_product_crud меняет каталог (версия catalog_version), в том числе
+        при записи в обход сервиса. Кэш и версия живут в одном процессе:
+        другие воркеры увидят изменение каталога не позже чем через TTL.
+        Пустой результат (в том числе при ошибке БД) не кэшируется.
+
+        Args:
+            db: Сессия базы данных
+
+        Returns:
+            List[Dict[str, Any]]: Список стран с дополнительной информацией
+        """
+        now = time.monotonic()
+        version = self.crud.catalog_version
+        if self._countries_cache is not None:
+            expires_at, cached_version, cached = self._countries_cache
+            if expires_at > now and cached_version == version:
+                return cached
+
+        countries = await self.get_available_countries(db)
+        if countries:
+            self._countries_cache = (now + self.countries_cache_ttl, version, countries)
+
+        return countries
+
+    def invalidate_countries_cache(self) -> None:
+        """Сброс кэша стран, например после отката транзакции с изменениями каталога."""
+        self._countries_cache = None
+
     async def get_featured_products(
         self,
         db: AsyncSession,
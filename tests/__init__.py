@@ -0,0 +1,12 @@
+"""
+Тесты gemup_marketplace.
+
+Пакет импортируется раньше tests/conftest.py и модулей app, поэтому
+переменные окружения, которые приложение читает при импорте, задаются здесь.
+"""
+
+import os
+
+# Минимальная стоимость bcrypt: passlib-контекст app.core.auth строится
+# из настроек при импорте, поэтому присваивание settings после импорта не действует
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
@@ -0,0 +1,18 @@
+"""
+Уникальные идентификаторы для тестовых данных.
+
+Уникальность нужна только в рамках прогона, поэтому вместо uuid4
+(системный вызов os.urandom) используется монотонный счетчик.
+Начальное значение зависит от PID, чтобы воркеры pytest-xdist
+не пересекались.
+"""
+
+import itertools
+import os
+
+_counter = itertools.count(os.getpid() << 16)
+
+
+def uid8() -> str:
+    """Следующий идентификатор процесса - не короче 8 hex-символов."""
+    return f"{next(_counter):08x}"
@@ -11,15 +11,14 @@ from app.models.models import ProxyProduct, ProxyType, ProxyCategory, SessionTyp
 
 
 @pytest.fixture
-def api_client(db_session: AsyncSession):
-    """FastAPI TestClient для HTTP тестов с изолированной БД"""
+def api_client(_session_test_client: TestClient, db_session: AsyncSession):
+    """Общий на сессию FastAPI TestClient, привязанный к изолированной БД теста"""
 
     async def override_get_db():
         yield db_session
 
     app.dependency_overrides[get_db] = override_get_db
-    client = TestClient(app)
-    yield client
+    yield _session_test_client
     app.dependency_overrides.clear()
 
 
@@ -73,7 +72,6 @@ def test_product(db_session: AsyncSession):
         )
         db_session.add(product)
         await db_session.commit()
-        await db_session.refresh(product)
         return product
 
     # Выполняем асинхронную функцию синхронно
@@ -107,27 +105,11 @@ def test_nodepay_product(db_session: AsyncSession):
         )
         db_session.add(product)
         await db_session.commit()
-        await db_session.refresh(product)
         return product
 
     return asyncio.get_event_loop().run_until_complete(create_product())
 
 
-@pytest.fixture
-def auth_headers(api_client: TestClient, test_user):
-    """Получение заголовков авторизации - СИНХРОННАЯ фикстура"""
-    login_data = {
-        "username": test_user.email,
-        "password": "testpassword123"
-    }
-
-    response = api_client.post("/api/v1/auth/login", data=login_data)
-    assert response.status_code == 200
-
-    token = response.json()["access_token"]
-    return {"Authorization": f"Bearer {token}"}
-
-
 @pytest.fixture
 def user_with_balance(test_user, db_session: AsyncSession):
     """Пользователь с балансом - СИНХРОННАЯ фикстура"""
@@ -136,7 +118,6 @@ def user_with_balance(test_user, db_session: AsyncSession):
     async def update_balance():
         test_user.balance = Decimal("100.00")
         await db_session.commit()
-        await db_session.refresh(test_user)
         return test_user
 
     return asyncio.get_event_loop().run_until_complete(update_balance())
@@ -150,9 +131,9 @@ def test_admin_user(db_session: AsyncSession):
     async def create_admin():
         from app.crud.user import user_crud
         from app.schemas.user import UserCreate
-        import uuid
+        from tests._ids import uid8
 
-        unique_id = str(uuid.uuid4())[:8]
+        unique_id = uid8()
         admin_data = UserCreate(
             email=f"admin-{unique_id}@example.com",
             username=f"admin-{unique_id}",
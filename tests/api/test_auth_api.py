@@ -1,13 +1,13 @@
-import uuid
-
 from fastapi.testclient import TestClient
 
+from tests._ids import uid8
+
 
 class TestAuthAPI:
 
     def test_register_success(self, api_client: TestClient):
         """Тест успешной регистрации"""
-        unique_id = str(uuid.uuid4())[:8]
+        unique_id = uid8()
         user_data = {
             "email": f"newuser-{unique_id}@example.com",
             "password": "newpassword123",
@@ -89,6 +89,7 @@ class TestAuthAPI:
 
         data = response.json()
         assert "email" in data
+        assert "username" in data
         assert "id" in data
 
     def test_refresh_token(self, api_client: TestClient, auth_headers):
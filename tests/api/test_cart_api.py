@@ -1,5 +1,11 @@
+import pytest
 from fastapi.testclient import TestClient
 
+# Допустимые коды ответа, собранные один раз на модуль
+STATUS_INVALID_PRODUCT = frozenset({400, 404})
+STATUS_INVALID_QUANTITY = frozenset({400, 422})
+STATUS_GUEST_CART = frozenset({200, 403})
+
 
 class TestCartAPI:
 
@@ -27,25 +33,23 @@ class TestCartAPI:
         assert data["proxy_product_id"] == test_product.id
         assert data["quantity"] == 2
 
-    def test_add_invalid_product_to_cart(self, api_client: TestClient, auth_headers):
-        """Тест добавления несуществующего товара"""
-        cart_data = {
-            "proxy_product_id": 99999,
-            "quantity": 1
-        }
-
-        response = api_client.post("/api/v1/cart/items", json=cart_data, headers=auth_headers)
-        assert response.status_code in [400, 404]  # ИСПРАВЛЕНО: принимаем оба кода
+    @pytest.mark.parametrize("product_id,quantity,expected_statuses", [
+        (99999, 1, STATUS_INVALID_PRODUCT),
+        (None, 0, STATUS_INVALID_QUANTITY),
+    ], ids=["invalid_product", "invalid_quantity"])
+    def test_add_to_cart_rejected(self, request, api_client: TestClient, auth_headers,
+                                  product_id, quantity, expected_statuses):
+        """Тест отклонения несуществующего товара и неверного количества"""
+        if product_id is None:
+            product_id = request.getfixturevalue("test_product").id
 
-    def test_add_invalid_quantity(self, api_client: TestClient, auth_headers, test_product):
-        """Тест добавления с неверным количеством"""
         cart_data = {
-            "proxy_product_id": test_product.id,
-            "quantity": 0
+            "proxy_product_id": product_id,
+            "quantity": quantity
         }
 
         response = api_client.post("/api/v1/cart/items", json=cart_data, headers=auth_headers)
-        assert response.status_code in [400, 422]  # ИСПРАВЛЕНО: принимаем оба кода
+        assert response.status_code in expected_statuses, response.text
 
     def test_get_cart_with_items(self, api_client: TestClient, auth_headers, test_product):
         """Тест получения корзины с товарами"""
@@ -123,4 +127,4 @@ class TestCartAPI:
         """Тест доступа к корзине без авторизации"""
         response = api_client.get("/api/v1/cart/")
         # Может создать гостевого пользователя или вернуть ошибку
-        assert response.status_code in [200, 403]
+        assert response.status_code in STATUS_GUEST_CART, response.text
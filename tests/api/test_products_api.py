@@ -46,3 +46,16 @@ class TestProductsAPI:
             # Проверяем что цены в основном отсортированы (допускаем небольшие отклонения)
             sorted_prices = sorted(prices)
             assert prices[:5] == sorted_prices[:5]  # Проверяем только первые 5
+
+    def test_products_batch(self, api_client: TestClient, test_product):
+        """Тест пакетного запроса каталога"""
+        response = api_client.post("/api/v1/products/batch", json={"queries": [
+            {"path": "/", "params": {"per_page": 5}},
+            {"path": "/", "params": {"per_page": "five"}},
+            {"path": "/countries"},
+        ]})
+        assert response.status_code == 200
+
+        results = response.json()
+        assert [r["status_code"] for r in results] == [200, 422, 404]
+        assert results[0]["body"]["per_page"] == 5
@@ -33,25 +33,20 @@ class TestUsersAPI:
         assert data["first_name"] == "Updated"
         assert data["last_name"] == "User"
 
-    def test_update_profile_duplicate_email(self, api_client: TestClient, auth_headers, db_session):
+    def test_update_profile_duplicate_email(self, api_client: TestClient, auth_headers, make_user):
         """Тест обновления с существующим email"""
-        # ИСПРАВЛЕНО: убрали async и EmailStr()
-        from app.crud.user import user_crud
-        from app.schemas.user import UserCreate
         import asyncio
 
-        async def create_other_user():
-            other_user_data = UserCreate(
-                email="other@example.com",  # ИСПРАВЛЕНО: обычная строка
-                password="password123",
-                first_name="Other",
-                last_name="User",
-                username="otheruser"
-            )
-            return await user_crud.create_registered_user(db_session, user_in=other_user_data)
+        # Другой пользователь создается напрямую в БД, без хеширования пароля bcrypt
+        other_user = make_user(
+            email="other@example.com",
+            username="otheruser",
+            first_name="Other",
+            last_name="User"
+        )
 
         # Выполняем асинхронную операцию синхронно
-        asyncio.get_event_loop().run_until_complete(create_other_user())
+        asyncio.get_event_loop().run_until_complete(other_user)
 
         update_data = {
             "email": "other@example.com",
@@ -6,37 +6,101 @@
 """
 
 import asyncio
-import uuid
-from datetime import datetime, timedelta
+import logging
+import os
+import time
+from datetime import datetime, timezone
 from decimal import Decimal
+from types import MappingProxyType, SimpleNamespace
 from typing import Generator, AsyncGenerator
+from unittest.mock import patch
 
+import bcrypt
+import httpx
+import orjson
 import pytest
 import pytest_asyncio
 from fastapi.testclient import TestClient
-from httpx import AsyncClient
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
+from httpx import AsyncClient, ASGITransport
+from pytest_asyncio import is_async_test
+from sqlalchemy import event, insert, text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.pool import StaticPool
 
+from app.core.auth import auth_handler
+from app.core.config import settings
 from app.core.db import get_db
 from app.core.main import app
+from app.crud.proxy_purchase import proxy_purchase_crud
+from app.crud.transaction import transaction_crud
+from app.crud.user import user_crud
 from app.models.models import (
     Base, User, ProxyProduct, Order, OrderItem, Transaction, ProxyPurchase,
     ProxyType, ProxyCategory, SessionType, ProviderType, OrderStatus, TransactionType
 )
 from app.schemas.user import UserCreate, GuestUserCreate
-
-# Test database URL
-TEST_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
+from app.services.product_service import product_service
+from tests._ids import uid8
+
+# app.core.main configures logging on import; drop INFO/DEBUG records in tests,
+# warnings and errors still reach pytest's captured output
+logging.disable(logging.INFO)
+
+# load/test_performance.py is the older live-server copy of
+# integration/test_performance.py (it needs the app on localhost:8000),
+# so the default run does not import and collect it
+collect_ignore = ["load/test_performance.py"]
+
+# Symmetric JWT signing for tests, whatever the environment's .env selects.
+# auth_handler copies the algorithm at import time, so pin it there as well.
+settings.algorithm = auth_handler.algorithm = "HS256"
+
+# Password shared by registered test users
+TEST_PASSWORD = "testpassword123"
+
+# Shared async HTTP client settings
+CLIENT_LIMITS = httpx.Limits(max_keepalive_connections=100, max_connections=1000)
+CLIENT_TIMEOUT = httpx.Timeout(30.0, connect=5.0)
+
+# Far-future expiry for fixtures that do not assert on recency
+_FIXED_EXPIRES = datetime(2099, 1, 1, tzinfo=timezone.utc)
+
+# Test database: one in-memory SQLite database per xdist worker by default.
+# TEST_DATABASE_URL points the suite at a server database (asyncpg), where
+# each worker creates its tables in its own schema
+XDIST_WORKER = os.environ.get("PYTEST_XDIST_WORKER", "main")
+TEST_SCHEMA = f"test_{XDIST_WORKER}"
+TEST_DATABASE_URL = os.environ.get(
+    "TEST_DATABASE_URL",
+    f"sqlite+aiosqlite:///file:{TEST_SCHEMA}?mode=memory&cache=shared&uri=true"
+)
+IS_SQLITE = TEST_DATABASE_URL.startswith("sqlite")
+
+# Redis keys (rate limits, sessions) are isolated the same way: each xdist
+# worker uses its own logical database, DB 0 stays with the dev server
+settings.redis_db = 1 + (int(XDIST_WORKER[2:]) % 15 if XDIST_WORKER.startswith("gw") else 0)
+
+# HTTP requests in a test reuse that test's db_session connection through the
+# get_db override, so the pool only serves fixtures: one connection per test plus
+# the occasional fixture session. No pre-ping - connections never sit idle long
+# enough to go stale, and the check would add a round-trip per checkout
+# Durability is irrelevant for a throwaway schema, so commits do not wait
+# for the WAL flush (see also the UNLOGGED tables in the engine fixture)
+if IS_SQLITE:
+    _engine_options = {"poolclass": StaticPool, "connect_args": {"check_same_thread": False}}
+else:
+    _engine_options = {
+        "pool_size": 5,
+        "max_overflow": 0,
+        "pool_pre_ping": False,
+        "connect_args": {"server_settings": {"search_path": TEST_SCHEMA, "synchronous_commit": "off"}}
+    }
 
 # Create test engine
 test_engine = create_async_engine(
     TEST_DATABASE_URL,
     echo=False,  # Set to True for SQL debugging
-    poolclass=StaticPool,
-    connect_args={
-        "check_same_thread": False,
-    },
+    **_engine_options
 )
 
 TestingSessionLocal = async_sessionmaker(
@@ -46,53 +110,223 @@ TestingSessionLocal = async_sessionmaker(
 )
 
 
+def _disable_driver_transactions(dbapi_connection, connection_record):
+    """Let SQLAlchemy manage BEGIN itself so SAVEPOINT works on SQLite."""
+    dbapi_connection.isolation_level = None
+
+
+def _emit_begin(conn):
+    conn.exec_driver_sql("BEGIN")
+
+
+if IS_SQLITE:
+    event.listen(test_engine.sync_engine, "connect", _disable_driver_transactions)
+    event.listen(test_engine.sync_engine, "begin", _emit_begin)
+
+
+# Canonical read-only products, inserted once per session
+CANONICAL_PRODUCTS = {
+    "datacenter": {
+        "name": "Test US HTTP Proxies",
+        "description": "High-quality test proxies for automated testing",
+        "proxy_type": ProxyType.HTTP,
+        "proxy_category": ProxyCategory.DATACENTER,
+        "session_type": SessionType.ROTATING,
+        "provider": ProviderType.PROVIDER_711,
+        "country_code": "US",
+        "country_name": "United States",
+        "city": "New York",
+        "price_per_proxy": Decimal("2.00"),
+        "price_per_gb": Decimal("0.50"),
+        "duration_days": 30,
+        "min_quantity": 1,
+        "max_quantity": 1000,
+        "max_threads": 10,
+        "bandwidth_limit_gb": 100,
+        "uptime_guarantee": Decimal("99.9"),
+        "speed_mbps": 100,
+        "ip_pool_size": 10000,
+        "stock_available": 500,
+        "is_active": True,
+        "is_featured": True,
+        "provider_product_id": "711_test_product_123",
+    },
+    "residential": {
+        "name": "Test US Residential Proxies",
+        "proxy_type": ProxyType.HTTP,
+        "proxy_category": ProxyCategory.RESIDENTIAL,
+        "session_type": SessionType.ROTATING,
+        "provider": ProviderType.PROVIDER_711,
+        "country_code": "US",
+        "country_name": "United States",
+        "price_per_proxy": Decimal("3.00"),
+        "duration_days": 30,
+        "min_quantity": 1,
+        "max_quantity": 1000,
+        "stock_available": 500,
+        "is_active": True,
+    },
+    "mobile": {
+        "name": "Test US Mobile Proxies",
+        "proxy_type": ProxyType.HTTP,
+        "proxy_category": ProxyCategory.MOBILE,
+        "session_type": SessionType.STICKY,
+        "provider": ProviderType.PROVIDER_711,
+        "country_code": "US",
+        "country_name": "United States",
+        "price_per_proxy": Decimal("2.50"),
+        "duration_days": 30,
+        "min_quantity": 1,
+        "max_quantity": 1000,
+        "stock_available": 500,
+        "is_active": True,
+    },
+    "nodepay": {
+        "name": "Test Nodepay Farming Proxies",
+        "proxy_type": ProxyType.HTTP,
+        "proxy_category": ProxyCategory.NODEPAY,
+        "session_type": SessionType.STICKY,
+        "provider": ProviderType.PROVIDER_711,
+        "country_code": "US",
+        "country_name": "United States",
+        "price_per_proxy": Decimal("5.00"),
+        "duration_days": 30,
+        "points_per_hour": 120,
+        "farm_efficiency": Decimal("95.5"),
+        "auto_claim": True,
+        "multi_account_support": True,
+        "min_quantity": 1,
+        "max_quantity": 50,
+        "stock_available": 25,
+        "is_active": True,
+    },
+}
+
+
 @pytest.fixture(scope="session")
-def event_loop():
-    """Create an instance of the default event loop for the test session."""
-    loop = asyncio.get_event_loop_policy().new_event_loop()
-    yield loop
-    loop.close()
+def event_loop_policy() -> asyncio.AbstractEventLoopPolicy:
+    """Use uvloop for the test event loop when it is available (not on Windows)."""
+    try:
+        import uvloop
+    except ImportError:
+        return asyncio.DefaultEventLoopPolicy()
+    return uvloop.EventLoopPolicy()
 
 
-@pytest_asyncio.fixture(scope="function")
-async def db_session() -> AsyncGenerator[AsyncSession, None]:
+def pytest_collection_modifyitems(items):
+    """
+    Run every async test in the session event loop shared with session fixtures.
+
+    Tests in one process run one at a time: they share a single database connection
+    and each owns its outer transaction, so cooperative in-loop concurrency would mix
+    their writes. Parallelism comes from xdist workers instead.
+    """
+    session_loop = pytest.mark.asyncio(loop_scope="session")
+    for item in items:
+        if is_async_test(item):
+            item.add_marker(session_loop, append=False)
+
+
+@pytest_asyncio.fixture(scope="session")
+async def engine() -> AsyncGenerator[AsyncEngine, None]:
     """
-    Create a fresh database session for each test.
-    Ensures complete isolation between tests.
+    Create the schema once per test session (per worker under xdist)
+    and dispose of the engine's connections at the end.
     """
-    # Create all tables
     async with test_engine.begin() as conn:
+        if not IS_SQLITE:
+            await conn.execute(text(f'CREATE SCHEMA IF NOT EXISTS "{TEST_SCHEMA}"'))
         await conn.run_sync(Base.metadata.drop_all)
         await conn.run_sync(Base.metadata.create_all)
+        if not IS_SQLITE:
+            # Skip WAL for test tables; referencing tables must become
+            # UNLOGGED before the tables they point to
+            for table in reversed(Base.metadata.sorted_tables):
+                await conn.execute(text(f'ALTER TABLE "{table.name}" SET UNLOGGED'))
+
+    yield test_engine
+
+    async with test_engine.begin() as conn:
+        if IS_SQLITE:
+            await conn.run_sync(Base.metadata.drop_all)
+        else:
+            await conn.execute(text(f'DROP SCHEMA IF EXISTS "{TEST_SCHEMA}" CASCADE'))
 
-    # Create session
+    await test_engine.dispose()
+
+
+@pytest_asyncio.fixture(scope="session")
+async def canonical_products(engine: AsyncEngine) -> SimpleNamespace:
+    """
+    Insert the canonical products once and return their primary keys.
+    Tests must treat these rows as read-only.
+    """
     async with TestingSessionLocal() as session:
-        yield session
-        await session.rollback()
+        products = {key: ProxyProduct(**fields) for key, fields in CANONICAL_PRODUCTS.items()}
+        session.add_all(products.values())
+        await session.commit()
 
+        return SimpleNamespace(**{f"{key}_id": product.id for key, product in products.items()})
 
-@pytest.fixture(scope="function")
-def client(db_session: AsyncSession) -> Generator[TestClient, None, None]:
+
+@pytest_asyncio.fixture(scope="function")
+async def db_session(engine: AsyncEngine, canonical_products) -> AsyncGenerator[AsyncSession, None]:
     """
-    Create a test client with dependency injection.
+    Create a database session wrapped in an outer transaction for each test.
+    Commits inside the test only release a SAVEPOINT; teardown rolls everything back.
     """
+    async with engine.connect() as connection:
+        transaction = await connection.begin()
+        session = TestingSessionLocal(bind=connection, join_transaction_mode="create_savepoint")
 
-    def override_get_db():
         try:
-            yield db_session
+            yield session
         finally:
-            pass
+            await session.close()
+            await transaction.rollback()
 
-    app.dependency_overrides[get_db] = override_get_db
-    with TestClient(app) as test_client:
-        yield test_client
-    app.dependency_overrides.clear()
 
+_httpx_response_json = httpx.Response.json
 
-@pytest_asyncio.fixture(scope="function")
-async def async_client(db_session: AsyncSession) -> AsyncGenerator[AsyncClient, None]:
+
+def _orjson_response_json(self: httpx.Response, **kwargs):
+    if kwargs:
+        return _httpx_response_json(self, **kwargs)
+    return orjson.loads(self.content)
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _orjson_responses() -> Generator[None, None, None]:
+    """Parse test client response bodies with orjson instead of the stdlib json module."""
+    with patch.object(httpx.Response, "json", _orjson_response_json):
+        yield
+
+
+@pytest.fixture(autouse=True)
+def _fresh_countries_cache() -> Generator[None, None, None]:
     """
-    Create an async test client for testing async endpoints.
+    Drop the in-process countries cache after each test.
+    Cached rows may come from a test transaction that teardown rolls back.
+    """
+    yield
+    product_service.invalidate_countries_cache()
+
+
+@pytest.fixture(scope="session")
+def _session_test_client() -> Generator[TestClient, None, None]:
+    """
+    Sync TestClient shared by every sync HTTP test in the session.
+    Not entered as a context manager, so the app lifespan does not run.
+    """
+    test_client = TestClient(app)
+    yield test_client
+    test_client.close()
+
+
+@pytest.fixture(scope="function")
+def client(_session_test_client: TestClient, db_session: AsyncSession) -> Generator[TestClient, None, None]:
+    """
+    Bind the shared sync client to the current test's database session.
     """
 
     def override_get_db():
@@ -102,23 +336,49 @@ async def async_client(db_session: AsyncSession) -> AsyncGenerator[AsyncClient,
             pass
 
     app.dependency_overrides[get_db] = override_get_db
+    yield _session_test_client
+    app.dependency_overrides.clear()
+
+
+# The client calls the app in-process through ASGITransport: a network transport
+# (e.g. aiohttp via httpx-aiohttp) would need a running server, and http2=True
+# has no effect on ASGITransport since there is no connection or framing.
+# Unhandled app errors come back as 500 responses, which the tests assert on,
+# instead of being re-raised into the test (and through asyncio.gather)
+@pytest_asyncio.fixture(scope="session")
+async def _session_client() -> AsyncGenerator[AsyncClient, None]:
+    """AsyncClient shared by every async HTTP test in the session."""
+    async with AsyncClient(
+        transport=ASGITransport(app=app, raise_app_exceptions=False),
+        base_url="http://testserver",
+        limits=CLIENT_LIMITS,
+        timeout=CLIENT_TIMEOUT
+    ) as session_client:
+        yield session_client
+
 
-    async with AsyncClient(app=app, base_url="http://test") as client:
-        yield client
+@pytest_asyncio.fixture(scope="function")
+async def async_client(_session_client: AsyncClient, db_session: AsyncSession) -> AsyncGenerator[AsyncClient, None]:
+    """
+    Bind the shared async client to the current test's database session.
+    """
 
+    async def override_get_db():
+        yield db_session
+
+    app.dependency_overrides[get_db] = override_get_db
+    yield _session_client
     app.dependency_overrides.clear()
 
 
 @pytest_asyncio.fixture
 async def test_user(db_session: AsyncSession) -> User:
     """Create a test registered user."""
-    from app.crud.user import user_crud
-
-    unique_id = str(uuid.uuid4())[:8]
+    unique_id = uid8()
     user_data = UserCreate(
         email=f"testuser-{unique_id}@example.com",
         username=f"testuser-{unique_id}",
-        password="testpassword123",
+        password=TEST_PASSWORD,
         first_name="Test",
         last_name="User"
     )
@@ -130,9 +390,7 @@ async def test_user(db_session: AsyncSession) -> User:
 @pytest_asyncio.fixture
 async def test_admin_user(db_session: AsyncSession) -> User:
     """Create a test admin user."""
-    from app.crud.user import user_crud
-
-    unique_id = str(uuid.uuid4())[:8]
+    unique_id = uid8()
     user_data = UserCreate(
         email=f"admin-{unique_id}@example.com",
         username=f"admin-{unique_id}",
@@ -150,9 +408,7 @@ async def test_admin_user(db_session: AsyncSession) -> User:
 @pytest_asyncio.fixture
 async def test_guest_user(db_session: AsyncSession) -> User:
     """Create a test guest user."""
-    from app.crud.user import user_crud
-
-    session_id = f"guest-session-{str(uuid.uuid4())[:8]}"
+    session_id = f"guest-session-{uid8()}"
     guest_data = GuestUserCreate(session_id=session_id)
 
     guest = await user_crud.create_guest_user(db_session, obj_in=guest_data)
@@ -160,79 +416,134 @@ async def test_guest_user(db_session: AsyncSession) -> User:
 
 
 @pytest_asyncio.fixture
-async def test_proxy_product(db_session: AsyncSession) -> ProxyProduct:
-    """Create a test proxy product."""
-    product = ProxyProduct(
-        name="Test US HTTP Proxies",
-        description="High-quality test proxies for automated testing",
-        proxy_type=ProxyType.HTTP,
-        proxy_category=ProxyCategory.DATACENTER,
-        session_type=SessionType.ROTATING,
-        provider=ProviderType.PROVIDER_711,
-        country_code="US",
-        country_name="United States",
-        city="New York",
-        price_per_proxy=Decimal("2.00"),
-        price_per_gb=Decimal("0.50"),
-        duration_days=30,
-        min_quantity=1,
-        max_quantity=1000,
-        max_threads=10,
-        bandwidth_limit_gb=100,
-        uptime_guarantee=Decimal("99.9"),
-        speed_mbps=100,
-        ip_pool_size=10000,
-        stock_available=500,
-        is_active=True,
-        is_featured=True,
-        provider_product_id="711_test_product_123"
-    )
+async def test_proxy_product(db_session: AsyncSession, canonical_products: SimpleNamespace) -> ProxyProduct:
+    """Load the canonical datacenter product inside the current test transaction."""
+    return await db_session.get(ProxyProduct, canonical_products.datacenter_id)
+
+
+PRODUCT_FACTORY_DEFAULTS = {
+    "name": "Test Product",
+    "proxy_type": ProxyType.HTTP,
+    "proxy_category": ProxyCategory.DATACENTER,
+    "session_type": SessionType.ROTATING,
+    "provider": ProviderType.PROVIDER_711,
+    "country_code": "US",
+    "country_name": "United States",
+    "price_per_proxy": Decimal("2.00"),
+    "duration_days": 30,
+    "stock_available": 100,
+    "is_active": True,
+}
+
+
+@pytest.fixture
+def proxy_product_factory(db_session: AsyncSession):
+    """
+    Build per-test products from shared defaults.
+    Each call flushes a single INSERT inside the test transaction; no commit or refresh.
+    """
+
+    async def _make(**overrides) -> ProxyProduct:
+        product = ProxyProduct(**{**PRODUCT_FACTORY_DEFAULTS, **overrides})
+        db_session.add(product)
+        await db_session.flush()
+        return product
+
+    return _make
+
+
+@pytest.fixture
+def insert_products(db_session: AsyncSession):
+    """
+    Insert several products from shared defaults with one executemany INSERT.
+    Each row only lists the fields that differ; no ORM objects are built.
+    """
+
+    async def _insert(rows: list) -> None:
+        await db_session.execute(
+            insert(ProxyProduct),
+            [{**PRODUCT_FACTORY_DEFAULTS, **row} for row in rows]
+        )
+
+    return _insert
 
-    db_session.add(product)
-    await db_session.commit()
-    await db_session.refresh(product)
-    return product
+
+# SQLite has no TRUNCATE; an unqualified DELETE already takes its truncate fast path.
+# On PostgreSQL TRUNCATE skips per-row index maintenance and dead tuples
+CLEAR_PRODUCTS_SQL = text(
+    "DELETE FROM proxy_products" if IS_SQLITE
+    else "TRUNCATE TABLE proxy_products RESTART IDENTITY CASCADE"
+)
 
 
 @pytest_asyncio.fixture
-async def test_order(db_session: AsyncSession, test_user: User, test_proxy_product: ProxyProduct) -> Order:
-    """Create a test order with order items."""
-    unique_id = str(uuid.uuid4())[:8]
+async def empty_products(db_session: AsyncSession) -> None:
+    """
+    Empty proxy_products (canonical rows included) for tests that count catalogue rows.
+    Runs inside the test transaction, so teardown rollback restores the table.
+    """
+    await db_session.execute(CLEAR_PRODUCTS_SQL)
 
-    order = Order(
-        order_number=f"ORD-TEST-{unique_id}",
-        user_id=test_user.id,
-        total_amount=Decimal("10.00"),
-        currency="USD",
-        status=OrderStatus.PENDING,
-        payment_method="balance"
-    )
 
-    db_session.add(order)
-    await db_session.commit()
-    await db_session.refresh(order)
+@pytest.fixture
+def statement_counter() -> Generator[list, None, None]:
+    """
+    Record every SQL statement sent to the test database while the test runs.
+    Tests take len() before and after a request to count its queries (N+1 checks).
+    """
+    statements = []
 
-    # Add order item
-    order_item = OrderItem(
-        order_id=order.id,
-        proxy_product_id=test_proxy_product.id,
-        quantity=5,
-        unit_price=Decimal("2.00"),
-        total_price=Decimal("10.00"),
-        generation_params='{"format": "ip:port:user:pass"}'
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(test_engine.sync_engine, "before_cursor_execute", _record)
+    yield statements
+    event.remove(test_engine.sync_engine, "before_cursor_execute", _record)
+
+
+@pytest.fixture(scope="session")
+def today_str() -> str:
+    """Date part of order numbers (ORD-YYYYMMDD-XXXXXXXX), read once per session."""
+    return datetime.now().strftime("%Y%m%d")
+
+
+@pytest_asyncio.fixture
+async def test_order(db_session: AsyncSession, test_user: User, test_proxy_product: ProxyProduct,
+                     today_str: str) -> Order:
+    """Create a test order with order items using Core inserts."""
+    result = await db_session.execute(
+        insert(Order).returning(Order.id),
+        {
+            "order_number": f"ORD-{today_str}-{uid8().upper()}",
+            "user_id": test_user.id,
+            "total_amount": Decimal("10.00"),
+            "currency": "USD",
+            "status": OrderStatus.PENDING,
+            "payment_method": "balance",
+        }
     )
+    order_id = result.scalar_one()
 
-    db_session.add(order_item)
+    await db_session.execute(
+        insert(OrderItem),
+        [{
+            "order_id": order_id,
+            "proxy_product_id": test_proxy_product.id,
+            "quantity": 5,
+            "unit_price": Decimal("2.00"),
+            "total_price": Decimal("10.00"),
+            "generation_params": '{"format": "ip:port:user:pass"}',
+        }]
+    )
     await db_session.commit()
 
-    return order
+    # Tests mutate and refresh the order, so hand back a persistent instance
+    return await db_session.get(Order, order_id)
 
 
 @pytest_asyncio.fixture
 async def test_transaction(db_session: AsyncSession, test_user: User, test_order: Order) -> Transaction:
     """Create a test transaction."""
-    from app.crud.transaction import transaction_crud
-
     transaction = await transaction_crud.create_transaction(
         db_session,
         user_id=test_user.id,
@@ -250,10 +561,6 @@ async def test_transaction(db_session: AsyncSession, test_user: User, test_order
 async def test_proxy_purchase(db_session: AsyncSession, test_user: User, test_order: Order,
                               test_proxy_product: ProxyProduct) -> ProxyPurchase:
     """Create a test proxy purchase."""
-    from app.crud.proxy_purchase import proxy_purchase_crud
-
-    expires_at = datetime.now() + timedelta(days=30)
-
     purchase = await proxy_purchase_crud.create_purchase(
         db_session,
         user_id=test_user.id,
@@ -262,18 +569,40 @@ async def test_proxy_purchase(db_session: AsyncSession, test_user: User, test_or
         proxy_list="192.168.1.1:8080:testuser:testpass\n192.168.1.2:8080:testuser:testpass",
         username="testuser",
         password="testpass",
-        expires_at=expires_at,
+        expires_at=_FIXED_EXPIRES,
         provider_order_id="711_test_order_456"
     )
 
     return purchase
 
 
+@pytest.fixture
+def bulk_purchases(db_session: AsyncSession, test_user: User, test_order: Order,
+                   test_proxy_product: ProxyProduct):
+    """
+    Insert several proxy purchases for test_user with one executemany INSERT.
+    Each row only lists the fields that differ; purchases come back in row order.
+    """
+    defaults = {
+        "user_id": test_user.id,
+        "proxy_product_id": test_proxy_product.id,
+        "order_id": test_order.id,
+        "expires_at": _FIXED_EXPIRES
+    }
+
+    async def _insert(rows: list) -> list:
+        purchases = await db_session.scalars(
+            insert(ProxyPurchase).returning(ProxyPurchase, sort_by_parameter_order=True),
+            [{**defaults, **row} for row in rows]
+        )
+        return purchases.all()
+
+    return _insert
+
+
 @pytest.fixture
 def auth_headers(test_user: User) -> dict:
     """Create authorization headers for authenticated requests."""
-    from app.core.auth import auth_handler
-
     access_token = auth_handler.create_access_token(
         data={"sub": str(test_user.id), "type": "access"}
     )
@@ -284,8 +613,6 @@ def auth_headers(test_user: User) -> dict:
 @pytest.fixture
 def admin_headers(test_admin_user: User) -> dict:
     """Create authorization headers for admin requests."""
-    from app.core.auth import auth_handler
-
     access_token = auth_handler.create_access_token(
         data={"sub": str(test_admin_user.id), "type": "access"}
     )
@@ -293,41 +620,117 @@ def admin_headers(test_admin_user: User) -> dict:
     return {"Authorization": f"Bearer {access_token}"}
 
 
+@pytest.fixture(scope="session")
+def test_password_hash() -> str:
+    """Hash TEST_PASSWORD once per session; bcrypt dominates user creation cost."""
+    return bcrypt.hashpw(TEST_PASSWORD.encode("utf-8"), bcrypt.gensalt(rounds=settings.bcrypt_rounds)).decode("utf-8")
+
+
+def _build_registered_user(password_hash: str, **overrides) -> User:
+    unique_id = uid8()
+    return User(**{
+        "email": f"user-{unique_id}@example.com",
+        "username": f"user-{unique_id}",
+        "hashed_password": password_hash,
+        "is_active": True,
+        "is_guest": False,
+        **overrides
+    })
+
+
+def _bearer_headers(user: User) -> dict:
+    access_token = auth_handler.create_access_token(
+        data={"sub": str(user.id), "type": "access"}
+    )
+    return {"Authorization": f"Bearer {access_token}"}
+
+
+@pytest.fixture
+def make_user(db_session: AsyncSession, test_password_hash: str):
+    """
+    Create a registered user directly in the database.
+    Uses the session's precomputed password hash instead of hashing per user.
+    """
+
+    async def _make(**overrides) -> User:
+        user = _build_registered_user(test_password_hash, **overrides)
+        db_session.add(user)
+        await db_session.flush()
+        return user
+
+    return _make
+
+
+@pytest.fixture
+def make_auth_headers(make_user):
+    """
+    Create a registered user directly in the database and return its auth headers.
+    Skips the /auth/register round-trip and per-user password hashing.
+    """
+
+    async def _make(**overrides) -> dict:
+        return _bearer_headers(await make_user(**overrides))
+
+    return _make
+
+
+@pytest.fixture
+def make_many_auth_headers(db_session: AsyncSession, test_password_hash: str):
+    """Create several registered users with one flush and return their auth headers."""
+
+    async def _make(count: int, **overrides) -> list:
+        users = [_build_registered_user(test_password_hash, **overrides) for _ in range(count)]
+        db_session.add_all(users)
+        await db_session.flush()
+        return [_bearer_headers(user) for user in users]
+
+    return _make
+
+
 # Мок данные для тестирования
+_CRYPTOMUS_OK = MappingProxyType({
+    'state': 0,
+    'result': MappingProxyType({
+        'uuid': 'test-payment-uuid-123',
+        'url': 'https://pay.cryptomus.com/pay/test-payment-uuid-123'
+    })
+})
+
+_PROXY_711_OK = MappingProxyType({
+    "success": True,
+    "order_id": "711_test_order_789",
+    "proxies": "203.0.113.1:8080:user123:pass456\n203.0.113.2:8080:user123:pass456",
+    "username": "user123",
+    "password": "pass456",
+    "expires_at": "2025-03-01T00:00:00Z",
+    "status": "active"
+})
+
+_WEBHOOK_DATA = MappingProxyType({
+    "order_id": "test-transaction-123",
+    "status": "paid",
+    "amount": "25.00",
+    "currency": "USD",
+    "sign": "valid_test_signature"
+})
+
+
 class MockData:
-    """Mock data for testing external APIs."""
+    """Mock data for testing external APIs. Payloads are shared and read-only."""
 
     @staticmethod
     def cryptomus_success_response():
-        return {
-            'state': 0,
-            'result': {
-                'uuid': 'test-payment-uuid-123',
-                'url': 'https://pay.cryptomus.com/pay/test-payment-uuid-123'
-            }
-        }
+        return _CRYPTOMUS_OK
 
     @staticmethod
     def proxy_711_success_response():
-        return {
-            "success": True,
-            "order_id": "711_test_order_789",
-            "proxies": "203.0.113.1:8080:user123:pass456\n203.0.113.2:8080:user123:pass456",
-            "username": "user123",
-            "password": "pass456",
-            "expires_at": "2025-03-01T00:00:00Z",
-            "status": "active"
-        }
+        return _PROXY_711_OK
 
     @staticmethod
     def webhook_data(order_id: str = "test-transaction-123"):
-        return {
-            "order_id": order_id,
-            "status": "paid",
-            "amount": "25.00",
-            "currency": "USD",
-            "sign": "valid_test_signature"
-        }
+        if order_id == _WEBHOOK_DATA["order_id"]:
+            return _WEBHOOK_DATA
+        return MappingProxyType({**_WEBHOOK_DATA, "order_id": order_id})
 
 
 # Pytest markers
@@ -344,21 +747,10 @@ def pytest_configure(config):
     config.addinivalue_line("markers", "external: mark test as requiring external services")
 
 
-# Test database cleanup
-@pytest.fixture(autouse=True)
-async def cleanup_database(db_session: AsyncSession):
-    """Clean up database after each test."""
-    yield
-    # This will be called after each test
-    await db_session.rollback()
-
-
 # Mock external services
 @pytest.fixture
 def mock_cryptomus_api():
     """Mock Cryptomus API responses."""
-    from unittest.mock import patch
-
     with patch('app.integrations.cryptomus.cryptomus_api') as mock:
         mock.create_payment.return_value = MockData.cryptomus_success_response()
         yield mock
@@ -367,8 +759,6 @@ def mock_cryptomus_api():
 @pytest.fixture
 def mock_proxy_711_api():
     """Mock 711Proxy API responses."""
-    from unittest.mock import patch
-
     with patch('app.integrations.proxy_711.proxy_711_api') as mock:
         mock.purchase_proxies.return_value = MockData.proxy_711_success_response()
         yield mock
@@ -378,8 +768,6 @@ def mock_proxy_711_api():
 @pytest.fixture
 def performance_timer():
     """Timer for performance testing."""
-    import time
-
     class Timer:
         def __init__(self):
             self.start_time = None
@@ -0,0 +1,131 @@
+"""
+Фикстуры интеграционных тестов.
+
+Используется общий на сессию HTTP клиент из корневого conftest,
+а изоляция БД обеспечивается через dependency_overrides.
+"""
+
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import pytest
+import pytest_asyncio
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.integrations.base import BaseIntegration, IntegrationError
+from app.models.models import ProxyProduct, User
+from app.services.order_service import order_service
+from tests.conftest import MockData, TestingSessionLocal
+from tests.mocks import MockOrderData
+
+# Балансы пользователя для фикстур заказов
+BALANCE_100 = Decimal("100.00")
+BALANCE_20 = Decimal("20.00")
+
+
+@pytest.fixture
+def client(async_client: AsyncClient) -> AsyncClient:
+    """Общий на сессию клиент, привязанный к транзакции текущего теста."""
+    return async_client
+
+
+@pytest_asyncio.fixture(scope="session")
+async def test_datacenter_product(canonical_products: SimpleNamespace) -> ProxyProduct:
+    """
+    Канонический datacenter продукт, загруженный один раз на сессию.
+    Только для чтения - тесты используют его id в запросах к корзине.
+    """
+    async with TestingSessionLocal() as session:
+        return await session.get(ProxyProduct, canonical_products.datacenter_id)
+
+
+@pytest_asyncio.fixture
+async def user_with_balance(test_user: User, db_session: AsyncSession) -> User:
+    """test_user с пополненным балансом."""
+    test_user.balance = BALANCE_100
+    await db_session.commit()
+    return test_user
+
+
+@pytest_asyncio.fixture
+async def created_order(client: AsyncClient, auth_headers: dict, db_session: AsyncSession, test_user: User,
+                        canonical_products: SimpleNamespace) -> dict:
+    """
+    Оплаченный заказ test_user, созданный через API: пополнение баланса,
+    добавление в корзину и оформление заказа. Возвращает JSON ответа.
+    """
+    test_user.balance = BALANCE_20
+    await db_session.commit()
+
+    cart_response = await client.post(
+        "/api/v1/cart/items",
+        json={"proxy_product_id": canonical_products.datacenter_id, "quantity": 2},
+        headers=auth_headers
+    )
+    assert cart_response.status_code == 201
+
+    order_response = await client.post("/api/v1/orders/", headers=auth_headers)
+    assert order_response.status_code == 201
+
+    return order_response.json()
+
+
+def _canned_cryptomus_response() -> dict:
+    """Свежая копия успешного ответа Cryptomus - сервис может дописывать поля в result."""
+    response = MockData.cryptomus_success_response()
+    return {**response, "result": dict(response["result"])}
+
+
+def _canned_proxy_711_response() -> dict:
+    return dict(MockData.proxy_711_success_response())
+
+
+# Ответы внешних API по имени провайдера - аналог httpx.MockTransport
+# для интеграций на aiohttp: реальные create_payment/purchase_proxies
+# выполняются целиком, но транспорт в сеть не выходит
+_CANNED_RESPONSES = {
+    "cryptomus": _canned_cryptomus_response,
+    "711proxy": _canned_proxy_711_response,
+}
+
+
+@pytest.fixture(autouse=True)
+def _offline_integrations(monkeypatch: pytest.MonkeyPatch) -> None:
+    """
+    Подменяет сетевой транспорт всех интеграций ответами из памяти.
+
+    Патчится BaseIntegration.make_request, поэтому подпись, валидация
+    и нормализация ответов провайдеров продолжают работать. Запрос
+    к неизвестному провайдеру падает с IntegrationError вместо похода в сеть.
+    Подмены действуют только в интеграционных тестах и снимаются
+    monkeypatch после каждого теста.
+    """
+
+    async def handler(self, method, endpoint, data=None, headers=None, timeout=None, retries=None):
+        canned = _CANNED_RESPONSES.get(self.provider_name)
+        if canned is None:
+            raise IntegrationError(
+                f"Unexpected network call in tests: {method} {endpoint}",
+                provider=self.provider_name
+            )
+        return canned()
+
+    monkeypatch.setattr(settings, "proxy_711_api_key", "test-711-api-key")
+    monkeypatch.setattr(settings, "cryptomus_api_key", "test-cryptomus-api-key")
+    monkeypatch.setattr(settings, "cryptomus_merchant_id", "test-merchant")
+    monkeypatch.setattr(BaseIntegration, "make_request", handler)
+
+
+@pytest.fixture(autouse=True)
+def _stub_provider_purchase(monkeypatch: pytest.MonkeyPatch) -> AsyncMock:
+    """Покупка у провайдера возвращает мок-прокси по количеству из позиции корзины."""
+
+    async def purchase(cart_item):
+        return MockOrderData.generate_mock_proxy_purchase_data(cart_item.quantity)
+
+    provider_purchase = AsyncMock(side_effect=purchase)
+    monkeypatch.setattr(order_service, "_purchase_proxies_from_provider", provider_purchase)
+    return provider_purchase
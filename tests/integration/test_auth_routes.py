@@ -1,6 +1,10 @@
+import asyncio
+
 import pytest
 from httpx import AsyncClient
 
+STATUS_UNAUTHORIZED = frozenset({401, 403})
+
 
 @pytest.mark.integration
 @pytest.mark.api
@@ -8,14 +12,16 @@ from httpx import AsyncClient
 class TestAuthRoutes:
 
     @pytest.mark.asyncio
-    async def test_register_user(self, client: AsyncClient):
+    @pytest.mark.parametrize("email,username", [
+        ("register@example.com", "registeruser"),
+        ("register.second@example.com", "registeruser2"),
+    ])
+    async def test_register_user(self, client: AsyncClient, email, username):
         """Тест регистрации пользователя"""
-        import uuid
-        unique_id = str(uuid.uuid4())[:8]
-
+        # Каждый тест откатывается в db_session, поэтому фиксированные данные не конфликтуют
         user_data = {
-            "email": f"register-{unique_id}@example.com",
-            "username": f"registeruser-{unique_id}",
+            "email": email,
+            "username": username,
             "password": "password123",
             "first_name": "Register",
             "last_name": "User"
@@ -25,50 +31,10 @@ class TestAuthRoutes:
 
         assert response.status_code == 200
         data = response.json()
-        assert data["email"] == f"register-{unique_id}@example.com"
-        assert data["username"] == f"registeruser-{unique_id}"
+        assert data["email"] == email
+        assert data["username"] == username
         assert "id" in data
 
-    @pytest.mark.asyncio
-    async def test_register_duplicate_email(self, client: AsyncClient, test_user):
-        """Тест регистрации с дублирующимся email"""
-        user_data = {
-            "email": test_user.email,
-            "username": "newusername",
-            "password": "password123",
-            "first_name": "New",
-            "last_name": "User"
-        }
-
-        response = await client.post("/api/v1/auth/register", json=user_data)
-
-        assert response.status_code == 400
-        # ИСПРАВЛЕНО: проверяем разные форматы ответа
-        response_data = response.json()
-        if "detail" in response_data:
-            assert "already exists" in response_data["detail"]
-        elif "message" in response_data:
-            assert "already exists" in response_data["message"]
-        else:
-            # Если формат другой, просто проверяем статус
-            assert response.status_code == 400
-
-    @pytest.mark.asyncio
-    async def test_login_success(self, client: AsyncClient, test_user):
-        """Тест успешной авторизации"""
-        login_data = {
-            "username": test_user.email,
-            "password": "testpassword123"
-        }
-
-        response = await client.post("/api/v1/auth/login", data=login_data)
-
-        assert response.status_code == 200
-        data = response.json()
-        assert "access_token" in data
-        assert data["token_type"] == "bearer"
-        assert data["user"]["email"] == test_user.email
-
     @pytest.mark.asyncio
     async def test_login_wrong_password(self, client: AsyncClient, test_user):
         """Тест авторизации с неверным паролем"""
@@ -90,32 +56,18 @@ class TestAuthRoutes:
             # Если формат другой, просто проверяем статус
             assert response.status_code == 401
 
-    @pytest.mark.asyncio
-    async def test_get_current_user(self, client: AsyncClient, auth_headers):
-        """Тест получения информации о текущем пользователе"""
-        response = await client.get("/api/v1/auth/me", headers=auth_headers)
-
-        assert response.status_code == 200
-        data = response.json()
-        assert "email" in data
-        assert "username" in data
-
     @pytest.mark.asyncio
     async def test_get_current_user_unauthorized(self, client: AsyncClient):
         """Тест получения информации без авторизации"""
-        response = await client.get("/api/v1/auth/me")
+        # Запросы независимы и не обращаются к БД - выполняем их параллельно
+        response, invalid_token_response = await asyncio.gather(
+            client.get("/api/v1/auth/me"),
+            client.get("/api/v1/auth/me", headers={"Authorization": "Bearer invalid.token.value"})
+        )
 
         # API возвращает 403, не 401
         assert response.status_code == 403
         response_data = response.json()
         assert "message" in response_data
 
-    @pytest.mark.asyncio
-    async def test_debug_error_format(self, client: AsyncClient):
-        """Отладочный тест для проверки формата ошибок"""
-        response = await client.get("/api/v1/auth/me")
-        print(f"Status: {response.status_code}")
-        print(f"Response: {response.json()}")
-
-        # Этот тест всегда пройдет, но покажет формат ответа
-        assert response.status_code in [401, 403]
\ No newline at end of file
+        assert invalid_token_response.status_code in STATUS_UNAUTHORIZED, invalid_token_response.text
@@ -1,121 +0,0 @@
-import pytest
-from httpx import AsyncClient
-from decimal import Decimal
-
-from app.models.models import ProxyProduct, ProxyType, ProxyCategory, SessionType, ProviderType
-
-
-@pytest.mark.integration
-@pytest.mark.api
-class TestCartAPI:
-
-    @pytest.mark.asyncio
-    async def test_cancel_order(self, client: AsyncClient, auth_headers, db_session, test_user):
-        """Тест отмены заказа"""
-        # Создаем заказ сначала
-        test_user.balance = Decimal("20.00")
-        await db_session.commit()
-        await db_session.refresh(test_user)
-
-        product = ProxyProduct(
-            name="Test Order Product",
-            proxy_type=ProxyType.HTTP,
-            proxy_category=ProxyCategory.DATACENTER,
-            session_type=SessionType.STICKY,
-            provider=ProviderType.PROVIDER_711,
-            country_code="US",
-            country_name="United States",
-            price_per_proxy=Decimal("2.00"),
-            duration_days=30,
-            min_quantity=1,
-            max_quantity=100,
-            stock_available=100,
-            is_active=True
-        )
-        db_session.add(product)
-        await db_session.commit()
-        await db_session.refresh(product)
-
-        # Добавляем товар в корзину
-        await client.post(
-            "/api/v1/cart/items",
-            json={
-                "proxy_product_id": product.id,
-                "quantity": 2
-            },
-            headers=auth_headers
-        )
-
-        # Создаем заказ
-        order_response = await client.post(
-            "/api/v1/orders/",
-            headers=auth_headers
-        )
-        assert order_response.status_code == 201
-        order_data = order_response.json()
-        order_id = order_data["id"]
-
-        # Отменяем заказ
-        response = await client.post(
-            f"/api/v1/orders/{order_id}/cancel",
-            json={"reason": "Test cancellation"},
-            headers=auth_headers
-        )
-        assert response.status_code == 200
-
-        data = response.json()
-        # ИСПРАВЛЕНО: проверяем правильную структуру ответа
-        if "status" in data:
-            assert data["status"] == "cancelled"
-        elif "message" in data:
-            assert "cancelled" in data["message"]
-        else:
-            # Если API возвращает другую структуру, проверяем успешность по статус коду
-            assert response.status_code == 200
-
-    @pytest.mark.asyncio
-    async def test_create_order_insufficient_balance(self, client: AsyncClient, auth_headers, db_session, test_user):
-        """Тест создания заказа с недостаточным балансом"""
-        # Устанавливаем низкий баланс
-        test_user.balance = Decimal("1.00")
-        await db_session.commit()
-
-        # Создаем дорогой продукт
-        product = ProxyProduct(
-            name="Expensive Product",
-            proxy_type=ProxyType.HTTP,
-            proxy_category=ProxyCategory.RESIDENTIAL,
-            session_type=SessionType.ROTATING,
-            provider=ProviderType.PROVIDER_711,
-            country_code="US",
-            country_name="United States",
-            price_per_proxy=Decimal("10.00"),
-            duration_days=30,
-            min_quantity=1,
-            max_quantity=100,
-            stock_available=100,
-            is_active=True
-        )
-        db_session.add(product)
-        await db_session.commit()
-        await db_session.refresh(product)
-
-        # Добавляем в корзину
-        await client.post(
-            "/api/v1/cart/items",
-            json={
-                "proxy_product_id": product.id,
-                "quantity": 1
-            },
-            headers=auth_headers
-        )
-
-        # Пытаемся создать заказ
-        response = await client.post("/api/v1/orders/", headers=auth_headers)
-        # ИСПРАВЛЕНО: правильный статус код
-        assert response.status_code == 402  # Payment Required
-
-        # ИСПРАВЛЕНО: проверяем правильную структуру ответа - API возвращает "message", а не "detail"
-        error_data = response.json()
-        assert "message" in error_data
-        assert "Insufficient balance" in error_data["message"]
@@ -4,13 +4,26 @@
 Тестирует полный путь пользователя от регистрации до получения прокси.
 """
 
+import orjson
 import pytest
 from httpx import AsyncClient
 from decimal import Decimal
-from unittest.mock import patch
 
-from app.models.models import ProxyProduct, ProxyType, ProxyCategory, SessionType, ProviderType
-from tests.mocks.order_mocks import MockOrderData
+from app.models.models import SessionType
+
+# Цены тестовых продуктов
+PRICE_0_50 = Decimal("0.50")
+PRICE_1 = Decimal("1.00")
+PRICE_2 = Decimal("2.00")
+PRICE_3 = Decimal("3.00")
+PRICE_5 = Decimal("5.00")
+
+# Статические тела запросов сериализуются один раз при импорте модуля
+TOP_UP_E2E_BODY = orjson.dumps({"amount": 50.0, "description": "E2E test top-up"})
+TOP_UP_CANCEL_BODY = orjson.dumps({"amount": 100.0, "description": "Cancel test top-up"})
+TOP_UP_BULK_BODY = orjson.dumps({"amount": 1000.0, "description": "Bulk purchase balance"})
+CANCEL_ORDER_BODY = orjson.dumps({"reason": "Changed my mind"})
+JSON_CONTENT_TYPE = {"Content-Type": "application/json"}
 
 
 @pytest.mark.integration
@@ -19,60 +32,25 @@ from tests.mocks.order_mocks import MockOrderData
 class TestFullOrderFlow:
     """E2E тесты полного flow заказов."""
 
-    async def test_complete_user_journey_success(self, client: AsyncClient, db_session):
+    async def test_complete_user_journey_success(self, client: AsyncClient, proxy_product_factory, make_auth_headers):
         """Тест полного пути пользователя: регистрация → покупка → получение прокси."""
-        import uuid
-        unique_id = str(uuid.uuid4())[:8]
-
-        # 1. Регистрация нового пользователя
-        user_data = {
-            "email": f"e2e-{unique_id}@example.com",
-            "username": f"e2euser-{unique_id}",
-            "password": "SecurePassword123!",
-            "first_name": "E2E",
-            "last_name": "User"
-        }
-
-        register_response = await client.post("/api/v1/auth/register", json=user_data)
-        assert register_response.status_code == 200
-
-        user_info = register_response.json()
-        auth_headers = {"Authorization": f"Bearer {user_info.get('access_token')}"}
+        # 1. Зарегистрированный пользователь создается напрямую в БД
+        auth_headers = await make_auth_headers()
 
         # 2. Создание продукта для покупки
-        product = ProxyProduct(
+        product = await proxy_product_factory(
             name="E2E Test Product",
-            proxy_type=ProxyType.HTTP,
-            proxy_category=ProxyCategory.DATACENTER,
-            session_type=SessionType.ROTATING,
-            provider=ProviderType.PROVIDER_711,
-            country_code="US",
-            country_name="United States",
-            price_per_proxy=Decimal("3.00"),
-            duration_days=30,
-            stock_available=100,
-            is_active=True
+            price_per_proxy=PRICE_3,
+            stock_available=100
         )
-        db_session.add(product)
-        await db_session.commit()
-        await db_session.refresh(product)
 
-        # 3. Пополнение баланса
-        with patch('app.integrations.cryptomus.cryptomus_api.create_payment') as mock_payment:
-            mock_payment.return_value = {
-                'state': 0,
-                'result': {
-                    'uuid': 'e2e-test-uuid',
-                    'url': 'https://mock-pay.com/e2e-test'
-                }
-            }
-
-            payment_response = await client.post(
-                "/api/v1/payments/create",
-                json={"amount": 50.0, "description": "E2E test top-up"},
-                headers=auth_headers
-            )
-            assert payment_response.status_code == 200
+        # 3. Пополнение баланса (Cryptomus замокан в conftest)
+        payment_response = await client.post(
+            "/api/v1/payments/create",
+            content=TOP_UP_E2E_BODY,
+            headers={**auth_headers, **JSON_CONTENT_TYPE}
+        )
+        assert payment_response.status_code == 200
 
         # 4. Симуляция успешного webhook (пополнение баланса)
         webhook_data = {
@@ -101,15 +79,12 @@ class TestFullOrderFlow:
         assert cart_data["summary"]["total_amount"] == "15.00"  # 5 * 3.00
 
         # 7. Создание заказа
-        with patch('app.services.order_service.order_service._purchase_proxies_from_provider') as mock_purchase:
-            mock_purchase.return_value = MockOrderData.generate_mock_proxy_purchase_data(5)
+        order_response = await client.post("/api/v1/orders/", headers=auth_headers)
+        assert order_response.status_code == 201
 
-            order_response = await client.post("/api/v1/orders/", headers=auth_headers)
-            assert order_response.status_code == 201
-
-            order_data = order_response.json()
-            assert order_data["status"] == "paid"
-            order_id = order_data["id"]
+        order_data = order_response.json()
+        assert order_data["status"] == "paid"
+        order_id = order_data["id"]
 
         # 8. Проверка что корзина очистилась
         empty_cart = await client.get("/api/v1/cart/", headers=auth_headers)
@@ -135,28 +110,18 @@ class TestFullOrderFlow:
         assert detail_data["id"] == order_id
         assert len(detail_data["order_items"]) == 1
 
-    async def test_guest_to_registered_conversion_flow(self, client: AsyncClient, db_session):
+    async def test_guest_to_registered_conversion_flow(self, client: AsyncClient, proxy_product_factory):
         """Тест flow конвертации гостя в зарегистрированного пользователя."""
-        import uuid
-        session_id = f"guest-e2e-{str(uuid.uuid4())[:8]}"
+        from tests._ids import uid8
+        session_id = f"guest-e2e-{uid8()}"
 
         # 1. Создание продукта
-        product = ProxyProduct(
+        product = await proxy_product_factory(
             name="Guest Test Product",
-            proxy_type=ProxyType.HTTP,
-            proxy_category=ProxyCategory.DATACENTER,
             session_type=SessionType.STICKY,
-            provider=ProviderType.PROVIDER_711,
-            country_code="US",
-            country_name="United States",
-            price_per_proxy=Decimal("2.00"),
-            duration_days=30,
-            stock_available=50,
-            is_active=True
+            price_per_proxy=PRICE_2,
+            stock_available=50
         )
-        db_session.add(product)
-        await db_session.commit()
-        await db_session.refresh(product)
 
         # 2. Добавление товара в корзину как гость
         guest_headers = {"X-Session-ID": session_id}
@@ -168,7 +133,7 @@ class TestFullOrderFlow:
         assert cart_response.status_code == 201
 
         # 3. Регистрация пользователя
-        unique_id = str(uuid.uuid4())[:8]
+        unique_id = uid8()
         user_data = {
             "email": f"guest-convert-{unique_id}@example.com",
             "username": f"guestconvert-{unique_id}",
@@ -189,141 +154,59 @@ class TestFullOrderFlow:
         # 5. Пополнение баланса и создание заказа
         # (аналогично предыдущему тесту)
 
-    async def test_concurrent_orders_handling(self, client: AsyncClient, db_session):
-        """Тест обработки параллельных заказов."""
-        import asyncio
-        import uuid
-
+    async def test_concurrent_orders_handling(self, client: AsyncClient, db_session, proxy_product_factory,
+                                              make_many_auth_headers):
+        """Тест конкурирующих заказов на ограниченный остаток."""
         # Создаем продукт с ограниченным количеством
-        product = ProxyProduct(
+        product = await proxy_product_factory(
             name="Limited Stock Product",
-            proxy_type=ProxyType.HTTP,
-            proxy_category=ProxyCategory.DATACENTER,
-            session_type=SessionType.ROTATING,
-            provider=ProviderType.PROVIDER_711,
-            country_code="US",
-            country_name="United States",
-            price_per_proxy=Decimal("1.00"),
-            duration_days=30,
-            stock_available=5,  # Ограниченное количество
-            is_active=True
+            price_per_proxy=PRICE_1,
+            stock_available=5  # Ограниченное количество
         )
-        db_session.add(product)
-        await db_session.commit()
-        await db_session.refresh(product)
 
-        # Создаем несколько пользователей
-        users_data = []
-        for i in range(3):
-            unique_id = str(uuid.uuid4())[:8]
-            user_data = {
-                "email": f"concurrent-{i}-{unique_id}@example.com",
-                "username": f"concurrent{i}-{unique_id}",
-                "password": "ConcurrentPassword123!",
-                "first_name": f"User{i}",
-                "last_name": "Concurrent"
-            }
-
-            register_response = await client.post("/api/v1/auth/register", json=user_data)
-            assert register_response.status_code == 200
-
-            user_info = register_response.json()
-            auth_headers = {"Authorization": f"Bearer {user_info.get('access_token')}"}
-            users_data.append(auth_headers)
-
-        # Функция для создания заказа
-        async def create_order(headers):
-            try:
-                # Добавляем в корзину
-                await client.post(
-                    "/api/v1/cart/items",
-                    json={"proxy_product_id": product.id, "quantity": 3},
-                    headers=headers
-                )
-
-                # Создаем заказ
-                with patch('app.services.order_service.order_service._purchase_proxies_from_provider') as mock_purchase:
-                    mock_purchase.return_value = MockOrderData.generate_mock_proxy_purchase_data(3)
-
-                    response = await client.post("/api/v1/orders/", headers=headers)
-                    return response
-
-            except Exception as e:
-                return {"error": str(e)}
-
-        # Выполняем параллельные запросы
-        tasks = [create_order(headers) for headers in users_data]
-        responses = await asyncio.gather(*tasks, return_exceptions=True)
-
-        # Анализируем результаты
-        successful_orders = 0
-        failed_orders = 0
-
-        for response in responses:
-            if hasattr(response, 'status_code'):
-                if response.status_code == 201:
-                    successful_orders += 1
-                else:
-                    failed_orders += 1
-            else:
-                failed_orders += 1
-
-        # Проверяем что система корректно обработала параллельные запросы
-        total_orders = successful_orders + failed_orders
-        assert total_orders == 3
-        # Хотя бы один заказ должен пройти успешно
-        assert successful_orders >= 1
-
-    async def test_order_cancellation_flow(self, client: AsyncClient, db_session):
-        """Тест flow отмены заказа и возврата средств."""
-        import uuid
-        unique_id = str(uuid.uuid4())[:8]
+        # Создаем несколько пользователей с балансом на один заказ
+        users_data = await make_many_auth_headers(3, balance=Decimal("10.00"))
 
-        # 1. Регистрация пользователя
-        user_data = {
-            "email": f"cancel-{unique_id}@example.com",
-            "username": f"canceluser-{unique_id}",
-            "password": "CancelPassword123!",
-            "first_name": "Cancel",
-            "last_name": "User"
-        }
+        # Каждая корзина по отдельности помещается в остаток, все вместе - нет
+        for headers in users_data:
+            cart_response = await client.post(
+                "/api/v1/cart/items",
+                json={"proxy_product_id": product.id, "quantity": 3},
+                headers=headers
+            )
+            assert cart_response.status_code == 201
 
-        register_response = await client.post("/api/v1/auth/register", json=user_data)
-        assert register_response.status_code == 200
+        # Заказы отправляются по очереди: все запросы теста идут через одну
+        # AsyncSession, которая не допускает параллельных операций
+        status_codes = []
+        for headers in users_data:
+            response = await client.post("/api/v1/orders/", headers=headers)
+            status_codes.append(response.status_code)
 
-        user_info = register_response.json()
-        auth_headers = {"Authorization": f"Bearer {user_info.get('access_token')}"}
+        # Остатка хватает ровно на один заказ
+        assert status_codes.count(201) == 1
+
+        await db_session.refresh(product)
+        assert product.stock_available == 2
+
+    async def test_order_cancellation_flow(self, client: AsyncClient, proxy_product_factory, make_auth_headers):
+        """Тест flow отмены заказа и возврата средств."""
+        # 1. Зарегистрированный пользователь создается напрямую в БД
+        auth_headers = await make_auth_headers()
 
         # 2. Создание продукта
-        product = ProxyProduct(
+        product = await proxy_product_factory(
             name="Cancellable Product",
-            proxy_type=ProxyType.HTTP,
-            proxy_category=ProxyCategory.DATACENTER,
-            session_type=SessionType.ROTATING,
-            provider=ProviderType.PROVIDER_711,
-            country_code="US",
-            country_name="United States",
-            price_per_proxy=Decimal("5.00"),
-            duration_days=30,
-            stock_available=20,
-            is_active=True
+            price_per_proxy=PRICE_5,
+            stock_available=20
         )
-        db_session.add(product)
-        await db_session.commit()
-        await db_session.refresh(product)
 
         # 3. Пополнение баланса
-        with patch('app.integrations.cryptomus.cryptomus_api.create_payment') as mock_payment:
-            mock_payment.return_value = {
-                'state': 0,
-                'result': {'uuid': 'cancel-test-uuid', 'url': 'https://mock-pay.com/cancel'}
-            }
-
-            payment_response = await client.post(
-                "/api/v1/payments/create",
-                json={"amount": 100.0, "description": "Cancel test top-up"},
-                headers=auth_headers
-            )
+        payment_response = await client.post(
+            "/api/v1/payments/create",
+            content=TOP_UP_CANCEL_BODY,
+            headers={**auth_headers, **JSON_CONTENT_TYPE}
+        )
 
         # Симуляция webhook
         webhook_data = {
@@ -332,6 +215,8 @@ class TestFullOrderFlow:
             "amount": "100.0",
             "currency": "USD"
         }
+        # Webhook и добавление в корзину не объединяются в asyncio.gather:
+        # оба запроса работают через одну AsyncSession теста
         await client.post("/api/v1/payments/webhook/cryptomus", json=webhook_data)
 
         # 4. Создание заказа
@@ -341,19 +226,16 @@ class TestFullOrderFlow:
             headers=auth_headers
         )
 
-        with patch('app.services.order_service.order_service._purchase_proxies_from_provider') as mock_purchase:
-            mock_purchase.return_value = MockOrderData.generate_mock_proxy_purchase_data(4)
-
-            order_response = await client.post("/api/v1/orders/", headers=auth_headers)
-            assert order_response.status_code == 201
+        order_response = await client.post("/api/v1/orders/", headers=auth_headers)
+        assert order_response.status_code == 201
 
-            order_id = order_response.json()["id"]
+        order_id = order_response.json()["id"]
 
         # 5. Отмена заказа
         cancel_response = await client.post(
             f"/api/v1/orders/{order_id}/cancel",
-            json={"reason": "Changed my mind"},
-            headers=auth_headers
+            content=CANCEL_ORDER_BODY,
+            headers={**auth_headers, **JSON_CONTENT_TYPE}
         )
         assert cancel_response.status_code == 200
 
@@ -368,62 +250,29 @@ class TestFullOrderFlow:
         payment_history = await client.get("/api/v1/payments/history", headers=auth_headers)
         assert payment_history.status_code == 200
 
-    async def test_expired_proxy_handling(self, client: AsyncClient, db_session):
+    @pytest.mark.skip(reason="Требует манипуляции временем - заглушка для будущей реализации")
+    async def test_expired_proxy_handling(self):
         """Тест обработки истекших прокси."""
-        # Этот тест может быть сложен для реализации в integration тестах
-        # так как требует манипуляции временем
-        # Оставим как заглушку для будущей реализации
-        pass
 
-    async def test_bulk_proxy_purchase(self, client: AsyncClient, db_session):
+    async def test_bulk_proxy_purchase(self, client: AsyncClient, proxy_product_factory, make_auth_headers):
         """Тест массовой покупки прокси."""
-        import uuid
-        unique_id = str(uuid.uuid4())[:8]
-
-        # Регистрация пользователя с большим балансом
-        user_data = {
-            "email": f"bulk-{unique_id}@example.com",
-            "username": f"bulkuser-{unique_id}",
-            "password": "BulkPassword123!",
-            "first_name": "Bulk",
-            "last_name": "User"
-        }
-
-        register_response = await client.post("/api/v1/auth/register", json=user_data)
-        user_info = register_response.json()
-        auth_headers = {"Authorization": f"Bearer {user_info.get('access_token')}"}
+        # Зарегистрированный пользователь создается напрямую в БД
+        auth_headers = await make_auth_headers()
 
         # Создание продукта для массовой покупки
-        product = ProxyProduct(
+        product = await proxy_product_factory(
             name="Bulk Purchase Product",
-            proxy_type=ProxyType.HTTP,
-            proxy_category=ProxyCategory.DATACENTER,
-            session_type=SessionType.ROTATING,
-            provider=ProviderType.PROVIDER_711,
-            country_code="US",
-            country_name="United States",
-            price_per_proxy=Decimal("0.50"),
-            duration_days=30,
+            price_per_proxy=PRICE_0_50,
             max_quantity=1000,
-            stock_available=1000,
-            is_active=True
+            stock_available=1000
         )
-        db_session.add(product)
-        await db_session.commit()
-        await db_session.refresh(product)
 
         # Пополнение большого баланса
-        with patch('app.integrations.cryptomus.cryptomus_api.create_payment') as mock_payment:
-            mock_payment.return_value = {
-                'state': 0,
-                'result': {'uuid': 'bulk-test-uuid', 'url': 'https://mock-pay.com/bulk'}
-            }
-
-            payment_response = await client.post(
-                "/api/v1/payments/create",
-                json={"amount": 1000.0, "description": "Bulk purchase balance"},
-                headers=auth_headers
-            )
+        payment_response = await client.post(
+            "/api/v1/payments/create",
+            content=TOP_UP_BULK_BODY,
+            headers={**auth_headers, **JSON_CONTENT_TYPE}
+        )
 
         # Webhook
         webhook_data = {
@@ -432,6 +281,7 @@ class TestFullOrderFlow:
             "amount": "1000.0",
             "currency": "USD"
         }
+        # Последовательно по той же причине, что и в test_order_cancellation_flow
         await client.post("/api/v1/payments/webhook/cryptomus", json=webhook_data)
 
         # Массовая покупка (500 прокси)
@@ -441,13 +291,10 @@ class TestFullOrderFlow:
             headers=auth_headers
         )
 
-        with patch('app.services.order_service.order_service._purchase_proxies_from_provider') as mock_purchase:
-            mock_purchase.return_value = MockOrderData.generate_mock_proxy_purchase_data(500)
-
-            bulk_order_response = await client.post("/api/v1/orders/", headers=auth_headers)
+        bulk_order_response = await client.post("/api/v1/orders/", headers=auth_headers)
 
-            # Может потребоваться больше времени для обработки
-            assert bulk_order_response.status_code in [201, 202]  # Accepted для больших заказов
+        # Может потребоваться больше времени для обработки
+        assert bulk_order_response.status_code in [201, 202]  # Accepted для больших заказов
 
         # Проверка статистики
         stats_response = await client.get("/api/v1/proxies/stats", headers=auth_headers)
@@ -1,8 +1,13 @@
 import pytest
 from httpx import AsyncClient
 from decimal import Decimal
-from sqlalchemy import text
-from app.models.models import ProxyProduct, ProxyType, ProxyCategory, SessionType, ProviderType
+from app.models.models import ProxyCategory, SessionType
+
+# Цены и параметры тестовых продуктов
+PRICE_1_50 = Decimal("1.50")
+PRICE_2_50 = Decimal("2.50")
+PRICE_3 = Decimal("3.00")
+UPTIME_99_9 = Decimal("99.9")
 
 
 @pytest.mark.integration
@@ -20,30 +25,16 @@ class TestProductsAPI:
         assert isinstance(data["items"], list)
 
     @pytest.mark.asyncio
-    async def test_get_products_with_category_filter(self, client: AsyncClient, db_session):
+    async def test_get_products_with_category_filter(self, client: AsyncClient, proxy_product_factory,
+                                                     empty_products):
         """Тест фильтрации по категории прокси"""
-        # ИСПРАВЛЕНО: используем text() для SQL запросов
-        await db_session.execute(text("DELETE FROM proxy_products"))
-        await db_session.commit()
-
         # Создаем продукты разных категорий
-        residential = ProxyProduct(
+        await proxy_product_factory(
             name="Residential Proxy",
-            proxy_type=ProxyType.HTTP,
             proxy_category=ProxyCategory.RESIDENTIAL,
-            session_type=SessionType.ROTATING,
-            provider=ProviderType.PROVIDER_711,
-            country_code="US",
-            country_name="United States",
-            price_per_proxy=Decimal("3.00"),
-            duration_days=30,
-            is_active=True,
-            stock_available=100
+            price_per_proxy=PRICE_3
         )
 
-        db_session.add(residential)
-        await db_session.commit()
-
         # Тест фильтрации по residential
         response = await client.get("/api/v1/products/?proxy_category=residential")
         assert response.status_code == 200
@@ -55,31 +46,19 @@ class TestProductsAPI:
         assert product_data["proxy_category"] == "residential"
 
     @pytest.mark.asyncio
-    async def test_get_products_with_speed_and_uptime_filters(self, client: AsyncClient, db_session):
+    async def test_get_products_with_speed_and_uptime_filters(self, client: AsyncClient, proxy_product_factory,
+                                                              empty_products):
         """Тест фильтрации по скорости и uptime"""
-        # ИСПРАВЛЕНО: используем text() для SQL запросов
-        await db_session.execute(text("DELETE FROM proxy_products"))
-        await db_session.commit()
-
-        product = ProxyProduct(
+        await proxy_product_factory(
             name="High Performance Proxy",
-            proxy_type=ProxyType.HTTP,
             proxy_category=ProxyCategory.ISP,
             session_type=SessionType.STICKY,
-            provider=ProviderType.PROVIDER_711,
-            country_code="US",
-            country_name="United States",
-            price_per_proxy=Decimal("2.50"),
-            duration_days=30,
+            price_per_proxy=PRICE_2_50,
             speed_mbps=100,
-            uptime_guarantee=Decimal("99.9"),
-            is_active=True,
+            uptime_guarantee=UPTIME_99_9,
             stock_available=50
         )
 
-        db_session.add(product)
-        await db_session.commit()
-
         # Тест фильтрации по скорости
         response = await client.get("/api/v1/products/?min_speed=50")
         assert response.status_code == 200
@@ -91,31 +70,16 @@ class TestProductsAPI:
         assert product_data["speed_mbps"] == 100
 
     @pytest.mark.asyncio
-    async def test_get_categories_stats(self, client: AsyncClient, db_session):
+    async def test_get_categories_stats(self, client: AsyncClient, insert_products, empty_products):
         """Тест получения статистики по категориям"""
-        # ИСПРАВЛЕНО: используем text() для SQL запросов
-        await db_session.execute(text("DELETE FROM proxy_products"))
-        await db_session.commit()
-
         # Создаем продукты разных категорий
-        products = [
-            ProxyProduct(
-                name=f"Residential {i}",
-                proxy_type=ProxyType.HTTP,
-                proxy_category=ProxyCategory.RESIDENTIAL,
-                session_type=SessionType.ROTATING,
-                provider=ProviderType.PROVIDER_711,
-                country_code="US",
-                country_name="United States",
-                price_per_proxy=Decimal(f"{2 + i}.00"),
-                duration_days=30,
-                is_active=True,
-                stock_available=100
-            ) for i in range(3)
-        ]
-
-        db_session.add_all(products)
-        await db_session.commit()
+        await insert_products([
+            {
+                "name": f"Residential {i}",
+                "proxy_category": ProxyCategory.RESIDENTIAL,
+                "price_per_proxy": Decimal(2 + i),
+            } for i in range(3)
+        ])
 
         response = await client.get("/api/v1/products/categories/stats")
         assert response.status_code == 200
@@ -125,29 +89,14 @@ class TestProductsAPI:
         assert data["residential"]["count"] == 3
 
     @pytest.mark.asyncio
-    async def test_get_products_by_category(self, client: AsyncClient, db_session):
+    async def test_get_products_by_category(self, client: AsyncClient, proxy_product_factory, empty_products):
         """Тест получения продуктов по категории"""
-        # ИСПРАВЛЕНО: используем text() для SQL запросов
-        await db_session.execute(text("DELETE FROM proxy_products"))
-        await db_session.commit()
-
-        product = ProxyProduct(
+        await proxy_product_factory(
             name="Test Residential",
-            proxy_type=ProxyType.HTTP,
             proxy_category=ProxyCategory.RESIDENTIAL,
-            session_type=SessionType.ROTATING,
-            provider=ProviderType.PROVIDER_711,
-            country_code="US",
-            country_name="United States",
-            price_per_proxy=Decimal("3.00"),
-            duration_days=30,
-            is_active=True,
-            stock_available=100
+            price_per_proxy=PRICE_3
         )
 
-        db_session.add(product)
-        await db_session.commit()
-
         response = await client.get("/api/v1/products/categories/residential")
         assert response.status_code == 200
         data = response.json()
@@ -156,83 +105,68 @@ class TestProductsAPI:
         assert len(data["products"]) == 1
 
     @pytest.mark.asyncio
-    async def test_get_product_by_id(self, client: AsyncClient, db_session):
+    async def test_get_product_by_id(self, client: AsyncClient, proxy_product_factory):
         """Тест получения продукта по ID"""
-        product = ProxyProduct(
+        product = await proxy_product_factory(
             name="Test Product",
-            proxy_type=ProxyType.HTTP,
-            proxy_category=ProxyCategory.DATACENTER,
             session_type=SessionType.STICKY,
-            provider=ProviderType.PROVIDER_711,
-            country_code="US",
-            country_name="United States",
-            price_per_proxy=Decimal("1.50"),
-            duration_days=30,
-            is_active=True,
-            stock_available=100
+            price_per_proxy=PRICE_1_50
         )
 
-        db_session.add(product)
-        await db_session.commit()
-        await db_session.refresh(product)
-
         response = await client.get(f"/api/v1/products/{product.id}")
         assert response.status_code == 200
 
         data = response.json()
         assert data["id"] == product.id
         assert data["name"] == "Test Product"
+        for field in ["proxy_category", "price_per_proxy"]:
+            assert field in data
 
     @pytest.mark.asyncio
-    async def test_get_countries(self, client: AsyncClient, db_session):
+    async def test_get_products_by_ids(self, client: AsyncClient, proxy_product_factory):
+        """Тест получения нескольких продуктов по списку ID"""
+        first = await proxy_product_factory(name="First Product")
+        second = await proxy_product_factory(name="Second Product")
+        await proxy_product_factory(name="Other Product")
+
+        response = await client.get(f"/api/v1/products/?ids={first.id},{second.id}")
+        assert response.status_code == 200
+
+        data = response.json()
+        assert data["total"] == 2
+        assert {item["id"] for item in data["items"]} == {first.id, second.id}
+
+        response = await client.get("/api/v1/products/?ids=1,abc")
+        assert response.status_code == 422
+
+    @pytest.mark.asyncio
+    async def test_get_countries(self, client: AsyncClient, proxy_product_factory):
         """Тест получения списка стран"""
         # Создаем продукт для теста
-        product = ProxyProduct(
+        await proxy_product_factory(
             name="Test Product",
-            proxy_type=ProxyType.HTTP,
-            proxy_category=ProxyCategory.DATACENTER,
             session_type=SessionType.STICKY,
-            provider=ProviderType.PROVIDER_711,
-            country_code="US",
-            country_name="United States",
-            price_per_proxy=Decimal("1.50"),
-            duration_days=30,
-            is_active=True,
-            stock_available=100
+            price_per_proxy=PRICE_1_50
         )
 
-        db_session.add(product)
-        await db_session.commit()
-
-        response = await client.get("/api/v1/products/meta/countries")
+        response = await client.get("/api/v1/products/countries")
         assert response.status_code == 200
 
         data = response.json()
         assert isinstance(data, list)
 
     @pytest.mark.asyncio
-    async def test_check_product_availability(self, client: AsyncClient, db_session):
+    async def test_check_product_availability(self, client: AsyncClient, proxy_product_factory):
         """Тест проверки доступности товара"""
-        product = ProxyProduct(
+        product = await proxy_product_factory(
             name="Test Product",
-            proxy_type=ProxyType.HTTP,
-            proxy_category=ProxyCategory.DATACENTER,
             session_type=SessionType.STICKY,
-            provider=ProviderType.PROVIDER_711,
-            country_code="US",
-            country_name="United States",
-            price_per_proxy=Decimal("1.50"),
-            duration_days=30,
+            price_per_proxy=PRICE_1_50,
             min_quantity=1,
             max_quantity=100,
-            stock_available=50,
-            is_active=True
+            stock_available=50
         )
 
-        db_session.add(product)
-        await db_session.commit()
-        await db_session.refresh(product)
-
         response = await client.get(f"/api/v1/products/{product.id}/availability?quantity=10")
         assert response.status_code == 200
 
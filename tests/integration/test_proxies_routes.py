@@ -1,8 +1,30 @@
+from datetime import datetime, timedelta, timezone
 from unittest.mock import patch
 
 import pytest
 from httpx import AsyncClient
 
+from app.schemas.proxy_purchase import ProxyGenerationResponse
+
+# Покупок у пользователя в тесте списка: больше, чем допустимо запросов
+MY_PROXIES_COUNT = 50
+# Аутентификация с обновлением last_login, страница покупок и общее
+# количество со своими selectin-запросами продуктов; N+1 дал бы
+# запрос на каждую покупку
+MY_PROXIES_MAX_STATEMENTS = 15
+
+# Эндпоинты выгрузки списка прокси: генерация и скачивание файла
+PROXY_LIST_ENDPOINTS = [
+    pytest.param("POST", "/api/v1/proxies/{purchase_id}/generate", id="generate"),
+    pytest.param("GET", "/api/v1/proxies/{purchase_id}/download", id="download"),
+]
+PROXY_LIST_FORMAT = "ip:port:user:pass"
+
+# Сроки действия покупок считаются от одного момента импорта модуля:
+# данные тестов не зависят от времени их запуска
+NOW = datetime.now(timezone.utc)
+EXPIRED_1D = NOW - timedelta(days=1)
+
 
 @pytest.mark.integration
 @pytest.mark.api
@@ -18,6 +40,26 @@ class TestProxiesAPI:
         assert isinstance(data, list)
         assert len(data) == 0
 
+    @pytest.mark.asyncio
+    async def test_get_my_proxies_with_data(self, client: AsyncClient, auth_headers, bulk_purchases,
+                                            statement_counter):
+        """Тест списка прокси: число SQL-запросов не растет с числом покупок"""
+        await bulk_purchases([
+            {"proxy_list": f"10.0.{i // 250}.{i % 250 + 1}:8080:user:pass"}
+            for i in range(MY_PROXIES_COUNT)
+        ])
+
+        statements_before = len(statement_counter)
+        response = await client.get(f"/api/v1/proxies/?limit={MY_PROXIES_COUNT}", headers=auth_headers)
+        statements = len(statement_counter) - statements_before
+
+        assert response.status_code == 200
+
+        data = response.json()
+        assert data["total"] == MY_PROXIES_COUNT
+        assert len(data["purchases"]) == MY_PROXIES_COUNT
+        assert statements <= MY_PROXIES_MAX_STATEMENTS
+
     @pytest.mark.asyncio
     async def test_get_my_proxies_with_filter(self, client: AsyncClient, auth_headers):
         """Тест получения прокси с фильтром"""
@@ -62,19 +104,6 @@ class TestProxiesAPI:
         # Может быть 200 если покупка существует, или 404 если нет
         assert response.status_code in [200, 404]
 
-    @pytest.mark.asyncio
-    async def test_generate_proxy_list_invalid_purchase(self, client: AsyncClient, auth_headers):
-        """Тест генерации для несуществующей покупки"""
-        request_data = {"format_type": "ip:port:user:pass"}
-        response = await client.post("/api/v1/proxies/99999/generate", json=request_data, headers=auth_headers)
-        assert response.status_code in [400, 404]
-
-    @pytest.mark.asyncio
-    async def test_download_proxy_list_not_found(self, client: AsyncClient, auth_headers):
-        """Тест скачивания для несуществующей покупки"""
-        response = await client.get("/api/v1/proxies/99999/download", headers=auth_headers)
-        assert response.status_code in [400, 404]
-
     @pytest.mark.asyncio
     async def test_get_expiring_proxies(self, client: AsyncClient, auth_headers):
         """Тест получения истекающих прокси"""
@@ -103,40 +132,53 @@ class TestProxiesAPI:
         assert "total_traffic_gb" in data
 
     @pytest.mark.asyncio
+    @pytest.mark.parametrize("method, path", PROXY_LIST_ENDPOINTS)
     @patch('app.services.proxy_service.proxy_service.generate_proxy_list')
-    async def test_generate_proxy_list_success(self, mock_generate, client: AsyncClient, auth_headers):
-        """Тест успешной генерации списка прокси"""
-        mock_generate.return_value = {
-            "purchase_id": 1,
-            "proxy_count": 2,
-            "format": "ip:port:user:pass",
-            "proxies": ["1.2.3.4:8080:user:pass", "5.6.7.8:8080:user:pass"],
-            "expires_at": "2024-12-31T23:59:59"
-        }
-
-        request_data = {"format_type": "ip:port:user:pass"}
-        response = await client.post("/api/v1/proxies/1/generate", json=request_data, headers=auth_headers)
-
-        # Может быть 200 если покупка существует, или 404 если нет
-        assert response.status_code in [200, 404]
-
-    @pytest.mark.asyncio
-    @patch('app.services.proxy_service.proxy_service.generate_proxy_list')
-    async def test_download_proxy_list_success(self, mock_generate, client: AsyncClient, auth_headers):
-        """Тест успешного скачивания списка прокси"""
-        mock_generate.return_value = {
-            "purchase_id": 1,
-            "proxy_count": 2,
-            "format": "ip:port:user:pass",
-            "proxies": ["1.2.3.4:8080:user:pass", "5.6.7.8:8080:user:pass"],
-            "expires_at": "2024-12-31T23:59:59"
-        }
-
-        response = await client.get("/api/v1/proxies/1/download?format_type=ip:port:user:pass", headers=auth_headers)
-
-        # Может быть 200 если покупка существует, или 404 если нет
-        assert response.status_code in [200, 404]
+    async def test_proxy_list_export_success(self, mock_generate, client: AsyncClient, auth_headers,
+                                             method, path):
+        """Тест успешной генерации и скачивания списка прокси"""
+        mock_generate.return_value = ProxyGenerationResponse(
+            purchase_id=1,
+            proxy_count=2,
+            format=PROXY_LIST_FORMAT,
+            proxies=["1.2.3.4:8080:user:pass", "5.6.7.8:8080:user:pass"],
+            expires_at=datetime(2024, 12, 31, 23, 59, 59)
+        )
+
+        response = await client.request(
+            method,
+            path.format(purchase_id=1),
+            params={"format_type": PROXY_LIST_FORMAT} if method == "GET" else None,
+            json={"format_type": PROXY_LIST_FORMAT} if method == "POST" else None,
+            headers=auth_headers
+        )
+        assert response.status_code == 200
 
-        if response.status_code == 200:
+        if method == "GET":
             assert "text/plain" in response.headers.get("content-type", "")
             assert "attachment" in response.headers.get("content-disposition", "")
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("method, path", PROXY_LIST_ENDPOINTS)
+    @pytest.mark.parametrize("expired", [
+        pytest.param(False, id="not-found"),
+        pytest.param(True, id="expired"),
+    ])
+    async def test_proxy_list_export_unavailable(self, client: AsyncClient, auth_headers, bulk_purchases,
+                                                 method, path, expired):
+        """Тест выгрузки для несуществующей или истекшей покупки"""
+        purchase_id = 99999
+        if expired:
+            [purchase] = await bulk_purchases([{
+                "proxy_list": "1.2.3.4:8080:user:pass",
+                "expires_at": EXPIRED_1D
+            }])
+            purchase_id = purchase.id
+
+        response = await client.request(
+            method,
+            path.format(purchase_id=purchase_id),
+            json={"format_type": PROXY_LIST_FORMAT} if method == "POST" else None,
+            headers=auth_headers
+        )
+        assert response.status_code in [400, 404]
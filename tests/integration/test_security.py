@@ -7,6 +7,16 @@
 import pytest
 from httpx import AsyncClient
 import asyncio
+import re
+
+# Проверки тел ответов: один проход скомпилированного regex по тексту ответа
+# вместо отдельного поиска каждой подстроки в заново сериализованном теле
+XSS_RE = re.compile(r"<script>|javascript:")
+SENSITIVE_RE = re.compile(r"password|hashed_password|pwd|secret|private_key", re.I)
+INTERNAL_FIELDS_RE = re.compile(r"internal_id|secret_key|private_data", re.I)
+ERR_INFO_RE = re.compile(
+    r"traceback|file path|database|sql|stack trace|internal server|debug|exception", re.I
+)
 
 
 @pytest.mark.integration
@@ -15,18 +25,17 @@ import asyncio
 class TestSecurityIntegration:
     """Тесты безопасности API."""
 
+    @pytest.mark.xdist_group("redis")
     async def test_rate_limiting_protection(self, client: AsyncClient):
         """Тест защиты от rate limiting."""
-        # Быстрые повторные запросы на один endpoint
-        tasks = []
-        for _ in range(20):
-            task = client.get("/api/v1/products/")
-            tasks.append(task)
-
-        responses = await asyncio.gather(*tasks, return_exceptions=True)
+        # Быстрые повторные запросы на один endpoint через общий keep-alive клиент
+        responses = await asyncio.gather(
+            *(client.get("/api/v1/products/") for _ in range(20)),
+            return_exceptions=True
+        )
 
         # Проверяем что есть защита от спама
-        status_codes = [r.status_code for r in responses if hasattr(r, 'status_code')]
+        status_codes = [r.status_code for r in responses if not isinstance(r, BaseException)]
 
         # Должны быть как успешные запросы, так и заблокированные
         assert 200 in status_codes
@@ -83,10 +92,8 @@ class TestSecurityIntegration:
 
             # Проверяем что данные либо отклонены, либо правильно экранированы
             if response.status_code == 200:
-                data = response.json()
                 # Если данные сохранились, они должны быть безопасными
-                assert "<script>" not in str(data)
-                assert "javascript:" not in str(data)
+                assert not XSS_RE.search(response.text)
 
     async def test_authentication_bypass_attempts(self, client: AsyncClient):
         """Тест попыток обхода аутентификации."""
@@ -99,10 +106,6 @@ class TestSecurityIntegration:
             "/api/v1/payments/history"
         ]
 
-        for endpoint in protected_endpoints:
-            response = await client.get(endpoint)
-            assert response.status_code in [401, 403]  # Должен требовать аутентификации
-
         # Попытки с невалидными токенами
         invalid_tokens = [
             "Bearer invalid_token",
@@ -113,10 +116,15 @@ class TestSecurityIntegration:
             "Bearer undefined"
         ]
 
-        for token in invalid_tokens:
-            headers = {"Authorization": token}
-            response = await client.get("/api/v1/auth/me", headers=headers)
-            assert response.status_code in [401, 403]
+        # Запросы отклоняются до обращения к БД, поэтому общая сессия теста
+        # не используется и все попытки отправляются одновременно
+        responses = await asyncio.gather(
+            *(client.get(endpoint) for endpoint in protected_endpoints),
+            *(client.get("/api/v1/auth/me", headers={"Authorization": token}) for token in invalid_tokens)
+        )
+
+        # Должен требовать аутентификации
+        assert all(response.status_code in [401, 403] for response in responses)
 
     async def test_authorization_bypass_attempts(self, client: AsyncClient, auth_headers):
         """Тест попыток обхода авторизации."""
@@ -201,23 +209,14 @@ class TestSecurityIntegration:
         # Проверяем что пароли не возвращаются в ответах
         user_response = await client.get("/api/v1/auth/me", headers=auth_headers)
         if user_response.status_code == 200:
-            user_data = user_response.json()
-
             # Не должно быть полей с паролями
-            sensitive_fields = ["password", "hashed_password", "pwd", "secret", "private_key"]
-            for field in sensitive_fields:
-                assert field not in user_data
-                assert field not in str(user_data).lower()
+            assert not SENSITIVE_RE.search(user_response.text)
 
         # Проверяем заказы
         orders_response = await client.get("/api/v1/orders/", headers=auth_headers)
         if orders_response.status_code == 200:
-            orders_data = orders_response.json()
-
             # Не должно быть внутренних ID или ключей
-            internal_fields = ["internal_id", "secret_key", "private_data"]
-            for field in internal_fields:
-                assert field not in str(orders_data).lower()
+            assert not INTERNAL_FIELDS_RE.search(orders_response.text)
 
     async def test_error_information_disclosure(self, client: AsyncClient):
         """Тест на раскрытие информации в ошибках."""
@@ -225,22 +224,13 @@ class TestSecurityIntegration:
         response = await client.get("/api/v1/nonexistent/endpoint")
         assert response.status_code == 404
 
-        error_data = response.json()
-
         # Ошибка не должна раскрывать внутреннюю структуру
-        error_text = str(error_data).lower()
-        sensitive_info = [
-            "traceback", "file path", "database", "sql", "stack trace",
-            "internal server", "debug", "exception"
-        ]
-
-        for info in sensitive_info:
-            assert info not in error_text
+        assert not ERR_INFO_RE.search(response.text)
 
     async def test_session_management(self, client: AsyncClient):
         """Тест управления сессиями."""
-        import uuid
-        unique_id = str(uuid.uuid4())[:8]
+        from tests._ids import uid8
+        unique_id = uid8()
 
         # Регистрация пользователя
         user_data = {
@@ -266,24 +256,23 @@ class TestSecurityIntegration:
             response2 = await client.get("/api/v1/auth/me", headers=auth_headers)
             assert response2.status_code in [401, 403]
 
+    @pytest.mark.xdist_group("redis")
     async def test_brute_force_protection(self, client: AsyncClient, test_user):
         """Тест защиты от brute force атак."""
         # Множественные попытки входа с неверным паролем
-        login_attempts = []
-
-        for i in range(10):
-            login_data = {
-                "username": test_user.email,
-                "password": f"wrong_password_{i}"
-            }
-
-            task = client.post("/api/v1/auth/login", data=login_data)
-            login_attempts.append(task)
-
-        responses = await asyncio.gather(*login_attempts, return_exceptions=True)
+        responses = await asyncio.gather(
+            *(
+                client.post(
+                    "/api/v1/auth/login",
+                    data={"username": test_user.email, "password": f"wrong_password_{i}"}
+                )
+                for i in range(10)
+            ),
+            return_exceptions=True
+        )
 
         # Все попытки должны быть неуспешными
-        status_codes = [r.status_code for r in responses if hasattr(r, 'status_code')]
+        status_codes = [r.status_code for r in responses if not isinstance(r, BaseException)]
         assert all(code in [401, 429] for code in status_codes)
 
         # Должна быть защита от brute force (429 или временная блокировка)
@@ -293,7 +282,7 @@ class TestSecurityIntegration:
         else:
             # Проверяем что нет информации о валидности email
             for response in responses:
-                if hasattr(response, 'json'):
+                if not isinstance(response, BaseException):
                     error_msg = str(response.json()).lower()
                     assert "user not found" not in error_msg
                     assert "invalid email" not in error_msg
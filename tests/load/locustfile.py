@@ -40,6 +40,13 @@ class WebsiteUser(HttpUser):
         product_id = random.randint(1, 5)
         self.client.get(f"/api/v1/products/{product_id}")
 
+    @task(1)
+    def view_products_batch(self):
+        """Просмотр нескольких карточек продуктов одним запросом"""
+        # Те же ID 1-5, что и в view_product_details: в отчете Locust
+        # пакетный запрос сравнивается с одиночными
+        self.client.get("/api/v1/products/?ids=1,2,3,4,5", name="/api/v1/products/?ids=[batch]")
+
 
 class GuestUser(HttpUser):
     """Гостевой пользователь"""
@@ -4,6 +4,7 @@
 
 import asyncio
 import time
+from typing import Optional
 
 import aiohttp
 
@@ -13,6 +14,25 @@ class PerformanceTest:
 
     def __init__(self, base_url: str = "http://localhost:8080"):
         self.base_url = base_url
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    async def _ensure_session(self) -> aiohttp.ClientSession:
+        """
+        Общая keep-alive сессия для всех виртуальных пользователей.
+
+        Соединения переиспользуются между сессиями, поэтому замеры
+        не включают установку TCP соединения на каждого пользователя.
+        """
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=100, limit_per_host=100)
+            self._session = aiohttp.ClientSession(connector=connector)
+        return self._session
+
+    async def close(self):
+        """Закрытие HTTP сессии."""
+        if self._session and not self._session.closed:
+            await self._session.close()
+            self._session = None
 
     async def ramp_up_test(self, max_users: int = 100, ramp_duration: int = 60):
         """Тест с постепенным увеличением нагрузки"""
@@ -60,24 +80,26 @@ class PerformanceTest:
 
     async def simulate_user_session(self):
         """Симуляция пользовательской сессии"""
-        async with aiohttp.ClientSession() as session:
-            # Типичный путь пользователя
-            endpoints = [
-                "/api/v1/products/",
-                "/api/v1/products/1",
-                "/api/v1/products/categories/stats",
-                "/api/v1/products/meta/countries"
-            ]
-
-            for endpoint in endpoints:
-                try:
-                    async with session.get(f"{self.base_url}{endpoint}") as response:
-                        await response.text()
-                except Exception:
-                    pass
-
-                # Пауза между запросами
-                await asyncio.sleep(0.5)
+        session = await self._ensure_session()
+
+        # Типичный путь пользователя: страницы каталога независимы,
+        # поэтому запрашиваются одновременно, а не по очереди с паузами
+        endpoints = [
+            "/api/v1/products/",
+            "/api/v1/products/1",
+            "/api/v1/products/categories/stats",
+            "/api/v1/products/countries"
+        ]
+
+        await asyncio.gather(
+            *(self._fetch(session, endpoint) for endpoint in endpoints),
+            return_exceptions=True
+        )
+
+    async def _fetch(self, session: aiohttp.ClientSession, endpoint: str):
+        """GET запрос с чтением тела ответа"""
+        async with session.get(f"{self.base_url}{endpoint}") as response:
+            await response.text()
 
 
 async def run_performance_tests():
@@ -86,14 +108,17 @@ async def run_performance_tests():
 
     print("🚀 Starting performance tests...")
 
-    # Тест с постепенным увеличением нагрузки
-    await perf_test.ramp_up_test(max_users=50, ramp_duration=30)
+    try:
+        # Тест с постепенным увеличением нагрузки
+        await perf_test.ramp_up_test(max_users=50, ramp_duration=30)
 
-    # Пауза между тестами
-    await asyncio.sleep(10)
+        # Пауза между тестами
+        await asyncio.sleep(10)
 
-    # Тест с резким скачком
-    await perf_test.spike_test(normal_users=5, spike_users=50)
+        # Тест с резким скачком
+        await perf_test.spike_test(normal_users=5, spike_users=50)
+    finally:
+        await perf_test.close()
 
     print("\n✅ All performance tests completed!")
 
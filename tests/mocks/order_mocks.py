@@ -2,10 +2,13 @@
 Моки для OrderService - ТОЛЬКО для тестов
 """
 
-from typing import Dict, Any, List
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Dict, Any, List, Mapping
 from decimal import Decimal
 from datetime import datetime
-import uuid
+
+from tests._ids import uid8
 
 
 class MockOrderData:
@@ -21,14 +24,20 @@ class MockOrderData:
         return "\n".join(proxies)
 
     @staticmethod
-    def generate_mock_proxy_purchase_data(quantity: int) -> Dict[str, Any]:
-        """ИСПРАВЛЕНО: правильная структура для purchase_proxies_from_provider"""
-        return {
+    @lru_cache(maxsize=16)
+    def generate_mock_proxy_purchase_data(quantity: int) -> Mapping[str, Any]:
+        """
+        ИСПРАВЛЕНО: правильная структура для purchase_proxies_from_provider.
+
+        Результат кешируется по количеству и доступен только для чтения -
+        мок-данные не обязаны отличаться между тестами.
+        """
+        return MappingProxyType({
             "proxy_list": MockOrderData.generate_mock_proxies(quantity),
-            "username": f"test_user_{uuid.uuid4().hex[:8]}",
-            "password": f"test_pass_{uuid.uuid4().hex[:8]}",
-            "provider_order_id": f"mock_order_{uuid.uuid4().hex[:8]}"
-        }
+            "username": f"test_user_{uid8()}",
+            "password": f"test_pass_{uid8()}",
+            "provider_order_id": f"mock_order_{uid8()}"
+        })
 
     @staticmethod
     def mock_activate_proxies_result() -> bool:
@@ -47,7 +56,7 @@ class MockOrderService:
         """Мок создания заказа"""
         order_data = {
             "id": len(self.created_orders) + 1,
-            "order_number": f"ORD-MOCK-{uuid.uuid4().hex[:8].upper()}",
+            "order_number": f"ORD-MOCK-{uid8().upper()}",
             "user_id": user.id,
             "total_amount": Decimal("10.00"),
             "status": "paid",
@@ -5,7 +5,8 @@
 from typing import Dict, Any
 from decimal import Decimal
 from datetime import datetime
-import uuid
+
+from tests._ids import uid8
 
 
 class MockPaymentData:
@@ -15,7 +16,7 @@ class MockPaymentData:
     def generate_mock_transaction() -> Dict[str, Any]:
         """Генерация мок-транзакции"""
         return {
-            "transaction_id": f"TXN-MOCK-{uuid.uuid4().hex[:8].upper()}",
+            "transaction_id": f"TXN-MOCK-{uid8().upper()}",
             "amount": "50.00",
             "currency": "USD",
             "status": "pending",
@@ -25,7 +26,7 @@ class MockPaymentData:
     @staticmethod
     def generate_mock_payment_response(amount: Decimal) -> Dict[str, Any]:
         """Генерация мок-ответа платежа"""
-        transaction_id = f"TXN-MOCK-{uuid.uuid4().hex[:8].upper()}"
+        transaction_id = f"TXN-MOCK-{uid8().upper()}"
         return {
             "transaction_id": transaction_id,
             "payment_url": f"https://mock-payment.com/pay/{transaction_id}",
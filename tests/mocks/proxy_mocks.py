@@ -3,9 +3,10 @@
 """
 
 from typing import Dict, Any, List
-import uuid
 from datetime import datetime, timedelta
 
+from tests._ids import uid8
+
 
 class MockProxyData:
     """Мок-данные для прокси"""
@@ -49,7 +50,7 @@ class MockProxy711API:
         **kwargs
     ) -> Dict[str, Any]:
         """Мок покупки прокси"""
-        order_id = f"mock-711-{uuid.uuid4().hex[:8]}"
+        order_id = f"mock-711-{uid8()}"
 
         # Генерируем мок прокси
         proxies = []
@@ -88,9 +89,9 @@ class MockCryptomusAPI:
     ) -> Dict[str, Any]:
         """Мок создания платежа"""
         if not order_id:
-            order_id = f"payment_{uuid.uuid4().hex[:16]}"
+            order_id = f"payment_{uid8()}"
 
-        payment_uuid = f"mock-uuid-{uuid.uuid4().hex[:8]}"
+        payment_uuid = f"mock-uuid-{uid8()}"
         payment_url = f"https://mock-cryptomus.com/pay/{payment_uuid}"
 
         payment_data = {
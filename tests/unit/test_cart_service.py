@@ -43,7 +43,6 @@ class TestCartBusinessRules:
         )
         db_session.add(product)
         await db_session.commit()
-        await db_session.refresh(product)
 
         rules = CartBusinessRules()
         validation_data = {
@@ -112,7 +111,6 @@ class TestCartBusinessRules:
         )
         db_session.add(product)
         await db_session.commit()
-        await db_session.refresh(product)
 
         rules = CartBusinessRules()
         validation_data = {
@@ -140,7 +138,6 @@ class TestCartBusinessRules:
         )
         db_session.add(product)
         await db_session.commit()
-        await db_session.refresh(product)
 
         rules = CartBusinessRules()
         validation_data = {
@@ -324,7 +321,6 @@ class TestCartService:
         )
         db_session.add(cart_item)
         await db_session.commit()
-        await db_session.refresh(cart_item)
 
         with patch.object(cart_service.crud, 'update_cart_item_quantity') as mock_update:
             mock_update.return_value = cart_item
@@ -349,7 +345,6 @@ class TestCartService:
         )
         db_session.add(cart_item)
         await db_session.commit()
-        await db_session.refresh(cart_item)
 
         with patch.object(cart_service.crud, 'remove_cart_item') as mock_remove:
             mock_remove.return_value = True
@@ -426,7 +421,6 @@ class TestCartService:
         )
         db_session.add(product)
         await db_session.commit()
-        await db_session.refresh(product)
 
         # Добавляем в корзину
         cart_item = ShoppingCart(
@@ -162,7 +162,7 @@ class TestTransactionCRUD:
             await transaction_crud.create_transaction(
                 db_session,
                 user_id=test_user.id,
-                amount=Decimal(f"{i + 1}.00"),
+                amount=Decimal(i + 1),
                 currency="USD",
                 transaction_type=TransactionType.DEPOSIT
             )
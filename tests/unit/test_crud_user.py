@@ -4,7 +4,6 @@ Unit тесты для CRUD операций с пользователями.
 Тестирует создание, обновление, поиск и аутентификацию пользователей.
 """
 
-import uuid
 from datetime import datetime
 from decimal import Decimal
 
@@ -12,6 +11,7 @@ import pytest
 
 from app.crud.user import user_crud
 from app.schemas.user import UserCreate, UserUpdate, GuestUserCreate
+from tests._ids import uid8
 
 
 @pytest.mark.unit
@@ -21,7 +21,7 @@ class TestUserCRUD:
 
     async def test_create_registered_user_success(self, db_session):
         """Тест успешного создания зарегистрированного пользователя."""
-        unique_id = str(uuid.uuid4())[:8]
+        unique_id = uid8()
 
         user_data = UserCreate(
             email=f"testuser-{unique_id}@example.com",
@@ -57,7 +57,7 @@ class TestUserCRUD:
 
     async def test_create_user_duplicate_username(self, db_session, test_user):
         """Тест создания пользователя с существующим username."""
-        unique_id = str(uuid.uuid4())[:8]
+        unique_id = uid8()
 
         user_data = UserCreate(
             email=f"newemail-{unique_id}@example.com",
@@ -207,7 +207,7 @@ class TestUserCRUD:
 
     async def test_create_guest_user(self, db_session):
         """Тест создания гостевого пользователя."""
-        session_id = f"guest-session-{str(uuid.uuid4())[:8]}"
+        session_id = f"guest-session-{uid8()}"
         guest_data = GuestUserCreate(session_id=session_id)
 
         guest_user = await user_crud.create_guest_user(db_session, obj_in=guest_data)
@@ -239,7 +239,7 @@ class TestUserCRUD:
 
     async def test_convert_guest_to_registered(self, db_session, test_guest_user):
         """Тест конвертации гостевого пользователя в зарегистрированного."""
-        unique_id = str(uuid.uuid4())[:8]
+        unique_id = uid8()
 
         user_data = UserCreate(
             email=f"converted-{unique_id}@example.com",
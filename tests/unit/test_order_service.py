@@ -5,8 +5,8 @@ Unit тесты для сервиса заказов.
 и интеграцию с внешними сервисами.
 """
 
-import uuid
 from decimal import Decimal
+from types import SimpleNamespace
 from unittest.mock import patch
 
 import pytest
@@ -17,6 +17,7 @@ from app.models.models import (
     SessionType, ProviderType, ShoppingCart
 )
 from app.services.order_service import order_service
+from tests._ids import uid8
 
 
 @pytest.mark.unit
@@ -43,8 +44,10 @@ class TestOrderService:
             is_active=True
         )
         db_session.add(product)
-        await db_session.commit()
-        await db_session.refresh(product)
+
+        # Пополняем баланс пользователя - сохраняется вместе с продуктом
+        test_user.balance = Decimal("20.00")
+        await db_session.flush()
 
         # Добавляем товар в корзину
         cart_item = ShoppingCart(
@@ -55,10 +58,6 @@ class TestOrderService:
         db_session.add(cart_item)
         await db_session.commit()
 
-        # Пополняем баланс пользователя
-        test_user.balance = Decimal("20.00")
-        await db_session.commit()
-
         # Мокаем создание покупки прокси
         with patch.object(order_service, 'create_proxy_purchases') as mock_create_purchases:
             mock_create_purchases.return_value = []
@@ -98,8 +97,7 @@ class TestOrderService:
             is_active=True
         )
         db_session.add(product)
-        await db_session.commit()
-        await db_session.refresh(product)
+        await db_session.flush()
 
         # Добавляем в корзину
         cart_item = ShoppingCart(
@@ -114,6 +112,28 @@ class TestOrderService:
         with pytest.raises(BusinessLogicError, match="Insufficient balance"):
             await order_service.create_order_from_cart(db_session, test_user)
 
+    async def test_create_order_purchases_failure_refunds(self, db_session, make_user, test_proxy_product, today_str):
+        """Тест возврата средств и статуса FAILED при сбое создания покупок."""
+        # Оплата уже списана: баланс 10.00 после заказа на 10.00
+        user = await make_user(balance=Decimal("10.00"))
+        order = Order(order_number=f"ORD-{today_str}-{uid8().upper()}", user_id=user.id,
+                      total_amount=Decimal("10.00"), status=OrderStatus.PAID)
+        db_session.add(order)
+        await db_session.commit()
+
+        # Позиция ссылается на несуществующий продукт - вставка покупок отклоняется
+        cart_item = SimpleNamespace(id=1, proxy_product_id=-1, proxy_product=test_proxy_product, quantity=1)
+        proxy_data = {"proxy_list": ["203.0.113.1:8080:user:pass"], "provider_order_id": "711_fail_1"}
+
+        with patch.object(order_service, "_purchase_proxies_from_provider", return_value=proxy_data):
+            with pytest.raises(BusinessLogicError, match="Product not found"):
+                await order_service._create_order_purchases(db_session, order, [cart_item])
+
+        await db_session.refresh(user)
+        await db_session.refresh(order)
+        assert user.balance == Decimal("20.00")
+        assert order.status == OrderStatus.FAILED
+
     async def test_get_user_orders(self, db_session, test_user, test_order):
         """Тест получения заказов пользователя."""
         orders = await order_service.get_user_orders(
@@ -128,11 +148,11 @@ class TestOrderService:
         # Создаем несколько заказов
         orders_to_create = []
         for i in range(5):
-            unique_id = str(uuid.uuid4())[:8]
+            unique_id = uid8()
             order = Order(
                 order_number=f"ORD-PAGINATION-{unique_id}-{i}",
                 user_id=test_user.id,
-                total_amount=Decimal(f"{i + 1}0.00"),
+                total_amount=Decimal((i + 1) * 10),
                 status=OrderStatus.PENDING
             )
             orders_to_create.append(order)
@@ -194,7 +214,7 @@ class TestOrderService:
         ]
 
         for i, (status, amount) in enumerate(orders_data):
-            unique_id = str(uuid.uuid4())[:8]
+            unique_id = uid8()
             order = Order(
                 order_number=f"ORD-SUMMARY-{unique_id}-{i}",
                 user_id=test_user.id,
@@ -220,7 +240,7 @@ class TestOrderService:
         """Тест поиска заказов."""
         # Создаем заказ с уникальным номером
         search_term = "SEARCH-TEST-12345"
-        unique_id = str(uuid.uuid4())[:8]
+        unique_id = uid8()
 
         order = Order(
             order_number=f"ORD-{search_term}-{unique_id}",
@@ -309,7 +329,7 @@ class TestOrderService:
 
     async def test_order_status_transitions(self, db_session, test_user):
         """Тест переходов статусов заказа."""
-        unique_id = str(uuid.uuid4())[:8]
+        unique_id = uid8()
 
         order = Order(
             order_number=f"ORD-STATUS-{unique_id}",
@@ -319,7 +339,6 @@ class TestOrderService:
         )
         db_session.add(order)
         await db_session.commit()
-        await db_session.refresh(order)
 
         # Тестируем допустимые переходы
         valid_transitions = [
@@ -344,7 +363,7 @@ class TestOrderService:
         """Тест обработки истечения заказов."""
         from datetime import datetime, timedelta
 
-        unique_id = str(uuid.uuid4())[:8]
+        unique_id = uid8()
 
         # Создаем заказ с истекшим сроком
         order = Order(
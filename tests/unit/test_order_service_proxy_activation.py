@@ -1,4 +1,3 @@
-import uuid
 from decimal import Decimal
 from unittest.mock import patch
 
@@ -9,6 +8,7 @@ from app.models.models import (
     TransactionType
 )
 from app.services.order_service import order_service
+from tests._ids import uid8
 
 
 @pytest.mark.unit
@@ -20,7 +20,7 @@ class TestOrderServiceProxyActivation:
             self, mock_activate_proxies, db_session, test_user
     ):
         """Тест активации прокси при успешной оплате заказа"""
-        unique_id = str(uuid.uuid4())[:8]
+        unique_id = uid8()
 
         # Создаем продукт с обязательным proxy_category
         product = ProxyProduct(
@@ -38,9 +38,10 @@ class TestOrderServiceProxyActivation:
             stock_available=100,
             is_active=True
         )
+        # Зависимые строки добавляются с flush для получения PK
+        # и фиксируются одним commit после элемента заказа
         db_session.add(product)
-        await db_session.commit()
-        await db_session.refresh(product)
+        await db_session.flush()
 
         # Создаем заказ с уникальным номером
         order = Order(
@@ -50,8 +51,7 @@ class TestOrderServiceProxyActivation:
             status=OrderStatus.PAID
         )
         db_session.add(order)
-        await db_session.commit()
-        await db_session.refresh(order)
+        await db_session.flush()
 
         # Создаем элемент заказа
         order_item = OrderItem(
@@ -8,12 +8,10 @@ Unit тесты для сервиса продуктов.
 from decimal import Decimal
 
 import pytest
-from sqlalchemy import text
 
 from app.core.exceptions import BusinessLogicError
-from app.models.models import (
-    ProxyProduct, ProxyCategory, ProxyType, SessionType, ProviderType
-)
+from app.crud.proxy_product import proxy_product_crud
+from app.models.models import ProxyCategory, SessionType
 from app.schemas.proxy_product import ProductFilter
 from app.services.product_service import product_service
 
@@ -23,44 +21,25 @@ from app.services.product_service import product_service
 class TestProductService:
     """Тесты сервиса продуктов."""
 
-    async def test_get_products_without_filters(self, db_session):
+    async def test_get_products_without_filters(self, db_session, insert_products, empty_products):
         """Тест получения всех продуктов без фильтров."""
-        # Очищаем таблицу и создаем тестовые продукты
-        await db_session.execute(text("DELETE FROM proxy_products"))
-        await db_session.commit()
-
-        products_data = [
+        # Создаем тестовые продукты
+        await insert_products([
             {
                 "name": "US HTTP Proxies",
                 "proxy_category": ProxyCategory.DATACENTER,
                 "country_code": "US",
+                "country_name": "Test Country",
                 "price_per_proxy": Decimal("2.00")
             },
             {
                 "name": "UK HTTPS Proxies",
                 "proxy_category": ProxyCategory.RESIDENTIAL,
                 "country_code": "UK",
+                "country_name": "Test Country",
                 "price_per_proxy": Decimal("3.50")
             }
-        ]
-
-        for data in products_data:
-            product = ProxyProduct(
-                name=data["name"],
-                proxy_type=ProxyType.HTTP,
-                proxy_category=data["proxy_category"],
-                session_type=SessionType.ROTATING,
-                provider=ProviderType.PROVIDER_711,
-                country_code=data["country_code"],
-                country_name="Test Country",
-                price_per_proxy=data["price_per_proxy"],
-                duration_days=30,
-                stock_available=100,
-                is_active=True
-            )
-            db_session.add(product)
-
-        await db_session.commit()
+        ])
 
         # Получаем продукты без фильтров
         products, total = await product_service.get_products_with_filter(
@@ -70,42 +49,22 @@ class TestProductService:
         assert len(products) == 2
         assert total == 2
 
-    async def test_get_products_with_category_filter(self, db_session):
+    async def test_get_products_with_category_filter(self, db_session, insert_products, empty_products):
         """Тест получения продуктов с фильтром по категории."""
-        await db_session.execute(text("DELETE FROM proxy_products"))
-        await db_session.commit()
-
         # Создаем продукты разных категорий
-        datacenter_product = ProxyProduct(
-            name="Datacenter Product",
-            proxy_type=ProxyType.HTTP,
-            proxy_category=ProxyCategory.DATACENTER,
-            session_type=SessionType.STICKY,
-            provider=ProviderType.PROVIDER_711,
-            country_code="US",
-            country_name="United States",
-            price_per_proxy=Decimal("1.50"),
-            duration_days=30,
-            stock_available=200,
-            is_active=True
-        )
-
-        residential_product = ProxyProduct(
-            name="Residential Product",
-            proxy_type=ProxyType.HTTP,
-            proxy_category=ProxyCategory.RESIDENTIAL,
-            session_type=SessionType.ROTATING,
-            provider=ProviderType.PROVIDER_711,
-            country_code="US",
-            country_name="United States",
-            price_per_proxy=Decimal("4.00"),
-            duration_days=30,
-            stock_available=100,
-            is_active=True
-        )
-
-        db_session.add_all([datacenter_product, residential_product])
-        await db_session.commit()
+        await insert_products([
+            {
+                "name": "Datacenter Product",
+                "session_type": SessionType.STICKY,
+                "price_per_proxy": Decimal("1.50"),
+                "stock_available": 200
+            },
+            {
+                "name": "Residential Product",
+                "proxy_category": ProxyCategory.RESIDENTIAL,
+                "price_per_proxy": Decimal("4.00")
+            }
+        ])
 
         # Фильтруем по категории DATACENTER
         filters = ProductFilter(proxy_category=ProxyCategory.DATACENTER)
@@ -117,31 +76,15 @@ class TestProductService:
         assert products[0].proxy_category == ProxyCategory.DATACENTER
         assert total == 1
 
-    async def test_get_products_with_price_range_filter(self, db_session):
+    async def test_get_products_with_price_range_filter(self, db_session, insert_products, empty_products):
         """Тест получения продуктов с фильтром по цене."""
-        await db_session.execute(text("DELETE FROM proxy_products"))
-        await db_session.commit()
-
         # Создаем продукты с разными ценами
         prices = [Decimal("1.00"), Decimal("2.50"), Decimal("5.00"), Decimal("10.00")]
 
-        for i, price in enumerate(prices):
-            product = ProxyProduct(
-                name=f"Product {i + 1}",
-                proxy_type=ProxyType.HTTP,
-                proxy_category=ProxyCategory.DATACENTER,
-                session_type=SessionType.ROTATING,
-                provider=ProviderType.PROVIDER_711,
-                country_code="US",
-                country_name="United States",
-                price_per_proxy=price,
-                duration_days=30,
-                stock_available=100,
-                is_active=True
-            )
-            db_session.add(product)
-
-        await db_session.commit()
+        await insert_products([
+            {"name": f"Product {i + 1}", "price_per_proxy": price}
+            for i, price in enumerate(prices)
+        ])
 
         # Фильтруем по диапазону цен 2.00 - 6.00
         filters = ProductFilter(min_price=2.00, max_price=6.00)
@@ -153,30 +96,14 @@ class TestProductService:
         assert total == 2
         assert all(Decimal("2.00") <= product.price_per_proxy <= Decimal("6.00") for product in products)
 
-    async def test_get_products_with_country_filter(self, db_session):
+    async def test_get_products_with_country_filter(self, db_session, insert_products, empty_products):
         """Тест получения продуктов с фильтром по стране."""
-        await db_session.execute(text("DELETE FROM proxy_products"))
-        await db_session.commit()
-
         countries = ["US", "UK", "DE"]
 
-        for country in countries:
-            product = ProxyProduct(
-                name=f"{country} Proxies",
-                proxy_type=ProxyType.HTTP,
-                proxy_category=ProxyCategory.DATACENTER,
-                session_type=SessionType.ROTATING,
-                provider=ProviderType.PROVIDER_711,
-                country_code=country,
-                country_name=f"Country {country}",
-                price_per_proxy=Decimal("2.00"),
-                duration_days=30,
-                stock_available=100,
-                is_active=True
-            )
-            db_session.add(product)
-
-        await db_session.commit()
+        await insert_products([
+            {"name": f"{country} Proxies", "country_code": country, "country_name": f"Country {country}"}
+            for country in countries
+        ])
 
         # Фильтруем по стране US
         filters = ProductFilter(country="US")
@@ -188,11 +115,8 @@ class TestProductService:
         assert products[0].country_code == "US"
         assert total == 1
 
-    async def test_get_products_with_search_filter(self, db_session):
+    async def test_get_products_with_search_filter(self, db_session, insert_products, empty_products):
         """Тест получения продуктов с поиском по названию."""
-        await db_session.execute(text("DELETE FROM proxy_products"))
-        await db_session.commit()
-
         products_data = [
             "Premium US HTTP Proxies",
             "Fast UK HTTPS Proxies",
@@ -200,23 +124,7 @@ class TestProductService:
             "Datacenter DE Proxies"
         ]
 
-        for name in products_data:
-            product = ProxyProduct(
-                name=name,
-                proxy_type=ProxyType.HTTP,
-                proxy_category=ProxyCategory.DATACENTER,
-                session_type=SessionType.ROTATING,
-                provider=ProviderType.PROVIDER_711,
-                country_code="US",
-                country_name="United States",
-                price_per_proxy=Decimal("2.00"),
-                duration_days=30,
-                stock_available=100,
-                is_active=True
-            )
-            db_session.add(product)
-
-        await db_session.commit()
+        await insert_products([{"name": name} for name in products_data])
 
         # Поиск по ключевому слову "US"
         filters = ProductFilter(search="US")
@@ -228,29 +136,10 @@ class TestProductService:
         assert total == 2
         assert all("US" in product.name for product in products)
 
-    async def test_get_products_with_pagination(self, db_session):
+    async def test_get_products_with_pagination(self, db_session, insert_products, empty_products):
         """Тест получения продуктов с пагинацией."""
-        await db_session.execute(text("DELETE FROM proxy_products"))
-        await db_session.commit()
-
         # Создаем 10 продуктов
-        for i in range(10):
-            product = ProxyProduct(
-                name=f"Product {i + 1:02d}",
-                proxy_type=ProxyType.HTTP,
-                proxy_category=ProxyCategory.DATACENTER,
-                session_type=SessionType.ROTATING,
-                provider=ProviderType.PROVIDER_711,
-                country_code="US",
-                country_name="United States",
-                price_per_proxy=Decimal("2.00"),
-                duration_days=30,
-                stock_available=100,
-                is_active=True
-            )
-            db_session.add(product)
-
-        await db_session.commit()
+        await insert_products([{"name": f"Product {i + 1:02d}"} for i in range(10)])
 
         # Первая страница (5 элементов)
         first_page, total = await product_service.get_products_with_filter(
@@ -271,26 +160,16 @@ class TestProductService:
         second_page_ids = {p.id for p in second_page}
         assert first_page_ids.isdisjoint(second_page_ids)
 
-    async def test_check_availability_success(self, db_session):
+    async def test_check_availability_success(self, db_session, proxy_product_factory):
         """Тест успешной проверки доступности товара."""
-        product = ProxyProduct(
+        product = await proxy_product_factory(
             name="Available Product",
-            proxy_type=ProxyType.HTTP,
-            proxy_category=ProxyCategory.DATACENTER,
             session_type=SessionType.STICKY,
-            provider=ProviderType.PROVIDER_711,
-            country_code="US",
-            country_name="United States",
             price_per_proxy=Decimal("3.00"),
-            duration_days=30,
             min_quantity=1,
             max_quantity=100,
-            stock_available=50,
-            is_active=True
+            stock_available=50
         )
-        db_session.add(product)
-        await db_session.commit()
-        await db_session.refresh(product)
 
         availability = await product_service.check_availability(
             db_session, product_id=product.id, quantity=10
@@ -301,24 +180,13 @@ class TestProductService:
         assert availability["max_quantity"] == 100
         assert availability["requested_quantity"] == 10
 
-    async def test_check_availability_insufficient_stock(self, db_session):
+    async def test_check_availability_insufficient_stock(self, db_session, proxy_product_factory):
         """Тест проверки доступности при недостаточном количестве на складе."""
-        product = ProxyProduct(
+        product = await proxy_product_factory(
             name="Low Stock Product",
-            proxy_type=ProxyType.HTTP,
-            proxy_category=ProxyCategory.DATACENTER,
             session_type=SessionType.STICKY,
-            provider=ProviderType.PROVIDER_711,
-            country_code="US",
-            country_name="United States",
-            price_per_proxy=Decimal("2.00"),
-            duration_days=30,
-            stock_available=3,  # Мало на складе
-            is_active=True
+            stock_available=3  # Мало на складе
         )
-        db_session.add(product)
-        await db_session.commit()
-        await db_session.refresh(product)
 
         availability = await product_service.check_availability(
             db_session, product_id=product.id, quantity=5
@@ -337,24 +205,13 @@ class TestProductService:
         assert availability["is_available"] is False
         assert "Product not found" in availability["message"]
 
-    async def test_check_availability_inactive_product(self, db_session):
+    async def test_check_availability_inactive_product(self, db_session, proxy_product_factory):
         """Тест проверки доступности неактивного продукта."""
-        product = ProxyProduct(
+        product = await proxy_product_factory(
             name="Inactive Product",
-            proxy_type=ProxyType.HTTP,
-            proxy_category=ProxyCategory.DATACENTER,
             session_type=SessionType.STICKY,
-            provider=ProviderType.PROVIDER_711,
-            country_code="US",
-            country_name="United States",
-            price_per_proxy=Decimal("2.00"),
-            duration_days=30,
-            stock_available=100,
             is_active=False  # Неактивный
         )
-        db_session.add(product)
-        await db_session.commit()
-        await db_session.refresh(product)
 
         availability = await product_service.check_availability(
             db_session, product_id=product.id, quantity=1
@@ -363,11 +220,8 @@ class TestProductService:
         assert availability["is_available"] is False
         assert "Product is not available" in availability["message"]
 
-    async def test_get_available_countries(self, db_session):
+    async def test_get_available_countries(self, db_session, insert_products, empty_products):
         """Тест получения списка доступных стран."""
-        await db_session.execute(text("DELETE FROM proxy_products"))
-        await db_session.commit()
-
         countries_data = [
             ("US", "United States"),
             ("UK", "United Kingdom"),
@@ -375,23 +229,10 @@ class TestProductService:
             ("US", "United States")  # Дубликат для проверки уникальности
         ]
 
-        for country_code, country_name in countries_data:
-            product = ProxyProduct(
-                name=f"{country_code} Proxies",
-                proxy_type=ProxyType.HTTP,
-                proxy_category=ProxyCategory.DATACENTER,
-                session_type=SessionType.ROTATING,
-                provider=ProviderType.PROVIDER_711,
-                country_code=country_code,
-                country_name=country_name,
-                price_per_proxy=Decimal("2.00"),
-                duration_days=30,
-                stock_available=100,
-                is_active=True
-            )
-            db_session.add(product)
-
-        await db_session.commit()
+        await insert_products([
+            {"name": f"{country_code} Proxies", "country_code": country_code, "country_name": country_name}
+            for country_code, country_name in countries_data
+        ])
 
         countries = await product_service.get_available_countries(db_session)
 
@@ -403,6 +244,21 @@ class TestProductService:
         assert "UK" in country_codes
         assert "DE" in country_codes
 
+    async def test_available_countries_cache_follows_crud_writes(self, db_session, insert_products,
+                                                                proxy_product_factory, empty_products):
+        """Тест сброса кэша стран при изменении каталога через CRUD."""
+        await insert_products([{"name": "US Proxies", "country_code": "US", "country_name": "United States"}])
+        de_product = await proxy_product_factory(name="DE Proxies", country_code="DE", country_name="Germany")
+
+        countries = await product_service.get_available_countries_cached(db_session)
+        assert {c["code"] for c in countries} == {"US", "DE"}
+
+        # Запись в обход сервиса - напрямую через proxy_product_crud
+        await proxy_product_crud.update(db_session, db_obj=de_product, obj_in={"is_active": False})
+
+        countries = await product_service.get_available_countries_cached(db_session)
+        assert {c["code"] for c in countries} == {"US"}
+
     async def test_get_product_by_id(self, db_session, test_proxy_product):
         """Тест получения продукта по ID."""
         product = await product_service.get_product_by_id(
@@ -421,44 +277,13 @@ class TestProductService:
 
         assert product is None
 
-    async def test_get_featured_products(self, db_session):
+    async def test_get_featured_products(self, db_session, insert_products, empty_products):
         """Тест получения рекомендуемых продуктов."""
-        await db_session.execute(text("DELETE FROM proxy_products"))
-        await db_session.commit()
-
         # Создаем обычный и рекомендуемый продукты
-        regular_product = ProxyProduct(
-            name="Regular Product",
-            proxy_type=ProxyType.HTTP,
-            proxy_category=ProxyCategory.DATACENTER,
-            session_type=SessionType.ROTATING,
-            provider=ProviderType.PROVIDER_711,
-            country_code="US",
-            country_name="United States",
-            price_per_proxy=Decimal("2.00"),
-            duration_days=30,
-            stock_available=100,
-            is_active=True,
-            is_featured=False
-        )
-
-        featured_product = ProxyProduct(
-            name="Featured Product",
-            proxy_type=ProxyType.HTTP,
-            proxy_category=ProxyCategory.DATACENTER,
-            session_type=SessionType.ROTATING,
-            provider=ProviderType.PROVIDER_711,
-            country_code="US",
-            country_name="United States",
-            price_per_proxy=Decimal("3.00"),
-            duration_days=30,
-            stock_available=100,
-            is_active=True,
-            is_featured=True
-        )
-
-        db_session.add_all([regular_product, featured_product])
-        await db_session.commit()
+        await insert_products([
+            {"name": "Regular Product", "is_featured": False},
+            {"name": "Featured Product", "price_per_proxy": Decimal("3.00"), "is_featured": True}
+        ])
 
         featured_products = await product_service.get_featured_products(
             db_session, limit=10
@@ -468,30 +293,14 @@ class TestProductService:
         assert featured_products[0].is_featured is True
         assert featured_products[0].name == "Featured Product"
 
-    async def test_get_products_by_category(self, db_session):
+    async def test_get_products_by_category(self, db_session, insert_products, empty_products):
         """Тест получения продуктов по категории."""
-        await db_session.execute(text("DELETE FROM proxy_products"))
-        await db_session.commit()
-
         categories = [ProxyCategory.DATACENTER, ProxyCategory.RESIDENTIAL, ProxyCategory.DATACENTER]
 
-        for i, category in enumerate(categories):
-            product = ProxyProduct(
-                name=f"Product {i + 1}",
-                proxy_type=ProxyType.HTTP,
-                proxy_category=category,
-                session_type=SessionType.ROTATING,
-                provider=ProviderType.PROVIDER_711,
-                country_code="US",
-                country_name="United States",
-                price_per_proxy=Decimal("2.00"),
-                duration_days=30,
-                stock_available=100,
-                is_active=True
-            )
-            db_session.add(product)
-
-        await db_session.commit()
+        await insert_products([
+            {"name": f"Product {i + 1}", "proxy_category": category}
+            for i, category in enumerate(categories)
+        ])
 
         datacenter_products = await product_service.get_products_by_category(
             db_session, category=ProxyCategory.DATACENTER
@@ -500,11 +309,8 @@ class TestProductService:
         assert len(datacenter_products) == 2
         assert all(p.proxy_category == ProxyCategory.DATACENTER for p in datacenter_products)
 
-    async def test_search_products(self, db_session):
+    async def test_search_products(self, db_session, insert_products, empty_products):
         """Тест поиска продуктов по ключевым словам."""
-        await db_session.execute(text("DELETE FROM proxy_products"))
-        await db_session.commit()
-
         products_data = [
             ("Premium US HTTP Proxies", "High-quality datacenter proxies"),
             ("Fast UK HTTPS Proxies", "Residential proxies for UK"),
@@ -512,24 +318,10 @@ class TestProductService:
             ("Germany Datacenter Proxies", "German datacenter solution")
         ]
 
-        for name, description in products_data:
-            product = ProxyProduct(
-                name=name,
-                description=description,
-                proxy_type=ProxyType.HTTP,
-                proxy_category=ProxyCategory.DATACENTER,
-                session_type=SessionType.ROTATING,
-                provider=ProviderType.PROVIDER_711,
-                country_code="US",
-                country_name="United States",
-                price_per_proxy=Decimal("2.00"),
-                duration_days=30,
-                stock_available=100,
-                is_active=True
-            )
-            db_session.add(product)
-
-        await db_session.commit()
+        await insert_products([
+            {"name": name, "description": description}
+            for name, description in products_data
+        ])
 
         # Поиск по "proxies"
         results = await product_service.search_products(
@@ -567,24 +359,13 @@ class TestProductService:
 
         assert updated_again.stock_available == original_stock + 5
 
-    async def test_update_product_stock_insufficient(self, db_session):
+    async def test_update_product_stock_insufficient(self, db_session, proxy_product_factory):
         """Тест обновления склада при недостаточном количестве."""
-        product = ProxyProduct(
+        product = await proxy_product_factory(
             name="Low Stock Product",
-            proxy_type=ProxyType.HTTP,
-            proxy_category=ProxyCategory.DATACENTER,
             session_type=SessionType.STICKY,
-            provider=ProviderType.PROVIDER_711,
-            country_code="US",
-            country_name="United States",
-            price_per_proxy=Decimal("2.00"),
-            duration_days=30,
-            stock_available=3,
-            is_active=True
+            stock_available=3
         )
-        db_session.add(product)
-        await db_session.commit()
-        await db_session.refresh(product)
 
         with pytest.raises(BusinessLogicError, match="Insufficient stock"):
             await product_service.update_product_stock(
@@ -593,31 +374,15 @@ class TestProductService:
                 quantity_change=-5  # Больше чем есть
             )
 
-    async def test_get_product_statistics(self, db_session):
+    async def test_get_product_statistics(self, db_session, insert_products, empty_products):
         """Тест получения статистики продуктов."""
-        await db_session.execute(text("DELETE FROM proxy_products"))
-        await db_session.commit()
-
         # Создаем продукты разных категорий
         categories = [ProxyCategory.DATACENTER, ProxyCategory.RESIDENTIAL, ProxyCategory.DATACENTER]
 
-        for i, category in enumerate(categories):
-            product = ProxyProduct(
-                name=f"Product {i + 1}",
-                proxy_type=ProxyType.HTTP,
-                proxy_category=category,
-                session_type=SessionType.ROTATING,
-                provider=ProviderType.PROVIDER_711,
-                country_code="US",
-                country_name="United States",
-                price_per_proxy=Decimal(f"{i + 2}.00"),
-                duration_days=30,
-                stock_available=100,
-                is_active=True
-            )
-            db_session.add(product)
-
-        await db_session.commit()
+        await insert_products([
+            {"name": f"Product {i + 1}", "proxy_category": category, "price_per_proxy": Decimal(i + 2)}
+            for i, category in enumerate(categories)
+        ])
 
         stats = await product_service.get_product_statistics(db_session)
 
@@ -661,28 +426,19 @@ class TestProductService:
         expected_price = test_proxy_product.price_per_proxy * quantity
         assert total_price == expected_price
 
-    async def test_get_similar_products(self, db_session, test_proxy_product):
+    async def test_get_similar_products(self, db_session, insert_products, test_proxy_product):
         """Тест получения похожих продуктов."""
         # Создаем похожие продукты
-        similar_products = []
-        for i in range(3):
-            product = ProxyProduct(
-                name=f"Similar Product {i + 1}",
-                proxy_type=test_proxy_product.proxy_type,
-                proxy_category=test_proxy_product.proxy_category,
-                session_type=SessionType.ROTATING,
-                provider=ProviderType.PROVIDER_711,
-                country_code=test_proxy_product.country_code,
-                country_name=test_proxy_product.country_name,
-                price_per_proxy=Decimal("2.50"),
-                duration_days=30,
-                stock_available=100,
-                is_active=True
-            )
-            db_session.add(product)
-            similar_products.append(product)
-
-        await db_session.commit()
+        await insert_products([
+            {
+                "name": f"Similar Product {i + 1}",
+                "proxy_type": test_proxy_product.proxy_type,
+                "proxy_category": test_proxy_product.proxy_category,
+                "country_code": test_proxy_product.country_code,
+                "country_name": test_proxy_product.country_name,
+                "price_per_proxy": Decimal("2.50")
+            } for i in range(3)
+        ])
 
         results = await product_service.get_similar_products(
             db_session, product_id=test_proxy_product.id, limit=5
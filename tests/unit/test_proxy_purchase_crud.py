@@ -5,12 +5,23 @@ Unit тесты для CRUD операций покупок прокси.
 управление статусами и проверку сроков действия.
 """
 
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from decimal import Decimal
 
 import pytest
+import pytest_asyncio
+from sqlalchemy import func, select
 
 from app.crud.proxy_purchase import proxy_purchase_crud
+from app.models.models import Order, ProxyPurchase
+from tests._ids import uid8
+
+# Сроки действия покупок считаются от одного момента импорта модуля
+NOW = datetime.now()
+EXPIRES_30D = NOW + timedelta(days=30)
+EXPIRES_5D = NOW + timedelta(days=5)
+NOW_UTC = datetime.now(timezone.utc)
+EXPIRES_30D_UTC = NOW_UTC + timedelta(days=30)
 
 
 @pytest.mark.unit
@@ -20,7 +31,7 @@ class TestProxyPurchaseCRUD:
 
     async def test_create_purchase_success(self, db_session, test_user, test_proxy_product, test_order):
         """Тест успешного создания покупки прокси."""
-        expires_at = datetime.now() + timedelta(days=30)
+        expires_at = EXPIRES_30D
 
         purchase = await proxy_purchase_crud.create_purchase(
             db_session,
@@ -46,7 +57,7 @@ class TestProxyPurchaseCRUD:
 
     async def test_create_purchase_with_proxy_list_array(self, db_session, test_user, test_proxy_product, test_order):
         """Тест создания покупки со списком прокси как массивом."""
-        expires_at = datetime.now() + timedelta(days=30)
+        expires_at = EXPIRES_30D
         proxy_list = [
             "203.0.113.1:8080:user:pass",
             "203.0.113.2:8080:user:pass",
@@ -66,6 +77,61 @@ class TestProxyPurchaseCRUD:
         assert purchase.proxy_list == expected_proxy_string
         assert purchase.is_active is True
 
+    @pytest_asyncio.fixture
+    async def bulk_order(self, db_session, make_user, today_str):
+        """Заказ пользователя, созданного напрямую в БД, для массовой вставки покупок."""
+        user = await make_user()
+        order = Order(order_number=f"ORD-{today_str}-{uid8().upper()}", user_id=user.id,
+                      total_amount=Decimal("10.00"))
+        db_session.add(order)
+        await db_session.flush()
+        return order
+
+    async def test_create_purchases_bulk(self, db_session, test_proxy_product, bulk_order):
+        """Тест массового создания покупок одним INSERT."""
+        purchases = [
+            {
+                "user_id": bulk_order.user_id,
+                "proxy_product_id": test_proxy_product.id,
+                "order_id": bulk_order.id,
+                "proxy_list": f"198.51.100.{i + 1}:8080:user:pass",
+                "expires_at": EXPIRES_30D_UTC
+            }
+            for i in range(3)
+        ]
+
+        created = await proxy_purchase_crud.create_purchases_bulk(db_session, purchases=purchases)
+        assert created == 3
+
+        user_purchases = await proxy_purchase_crud.get_user_purchases(db_session, user_id=bulk_order.user_id)
+        assert len(user_purchases) == 3
+        assert {p.proxy_list for p in user_purchases} == {p["proxy_list"] for p in purchases}
+        assert all(p.is_active for p in user_purchases)
+        assert all(p.order_id == bulk_order.id for p in user_purchases)
+
+    @pytest.mark.parametrize("overrides, error", [
+        ({"expires_at": NOW_UTC - timedelta(days=1)}, "Expiry date must be in the future"),
+        ({"proxy_product_id": 999999}, "Product not found"),
+        ({"user_id": 999999}, "User not found"),
+    ], ids=["expired", "unknown_product", "unknown_user"])
+    async def test_create_purchases_bulk_invalid(self, db_session, test_proxy_product, bulk_order,
+                                                 overrides, error):
+        """Тест отказа массовой вставки: ни одна покупка не создается."""
+        valid = {
+            "user_id": bulk_order.user_id,
+            "proxy_product_id": test_proxy_product.id,
+            "order_id": bulk_order.id,
+            "proxy_list": "198.51.100.1:8080:user:pass",
+            "expires_at": EXPIRES_30D_UTC
+        }
+
+        with pytest.raises(ValueError, match=error):
+            await proxy_purchase_crud.create_purchases_bulk(
+                db_session, purchases=[valid, {**valid, **overrides}]
+            )
+
+        assert await db_session.scalar(select(func.count(ProxyPurchase.id))) == 0
+
     async def test_get_purchase_by_id(self, db_session, test_proxy_purchase):
         """Тест получения покупки по ID."""
         found_purchase = await proxy_purchase_crud.get(db_session, obj_id=test_proxy_purchase.id)
@@ -102,31 +168,19 @@ class TestProxyPurchaseCRUD:
 
         assert found_purchase is None
 
-    async def test_get_user_purchases_all(self, db_session, test_user, test_proxy_product, test_order):
+    async def test_get_user_purchases_all(self, db_session, test_user, bulk_purchases):
         """Тест получения всех покупок пользователя."""
         # Создаем несколько покупок
         purchases_data = [
-            {"expires_at": datetime.now() + timedelta(days=30), "is_active": True},
-            {"expires_at": datetime.now() + timedelta(days=15), "is_active": True},
-            {"expires_at": datetime.now() - timedelta(days=5), "is_active": False}
+            {"expires_at": EXPIRES_30D, "is_active": True},
+            {"expires_at": NOW + timedelta(days=15), "is_active": True},
+            {"expires_at": NOW - timedelta(days=5), "is_active": False}
         ]
 
-        created_purchases = []
-        for i, data in enumerate(purchases_data):
-            purchase = await proxy_purchase_crud.create_purchase(
-                db_session,
-                user_id=test_user.id,
-                proxy_product_id=test_proxy_product.id,
-                order_id=test_order.id,
-                proxy_list=f"192.168.1.{i + 1}:8080:user:pass",
-                expires_at=data["expires_at"]
-            )
-
-            if not data["is_active"]:
-                purchase.is_active = False
-                await db_session.commit()
-
-            created_purchases.append(purchase)
+        await bulk_purchases([
+            {**data, "proxy_list": f"192.168.1.{i + 1}:8080:user:pass"}
+            for i, data in enumerate(purchases_data)
+        ])
 
         # Получаем все покупки
         all_purchases = await proxy_purchase_crud.get_user_purchases(
@@ -145,18 +199,13 @@ class TestProxyPurchaseCRUD:
         assert len(all_purchases) >= 3
         assert len(active_purchases) == 2  # Только активные
 
-    async def test_get_user_purchases_with_pagination(self, db_session, test_user, test_proxy_product, test_order):
+    async def test_get_user_purchases_with_pagination(self, db_session, test_user, bulk_purchases):
         """Тест получения покупок с пагинацией."""
         # Создаем 5 покупок
-        for i in range(5):
-            await proxy_purchase_crud.create_purchase(
-                db_session,
-                user_id=test_user.id,
-                proxy_product_id=test_proxy_product.id,
-                order_id=test_order.id,
-                proxy_list=f"192.168.2.{i + 1}:8080:user:pass",
-                expires_at=datetime.now() + timedelta(days=30)
-            )
+        await bulk_purchases([
+            {"proxy_list": f"192.168.2.{i + 1}:8080:user:pass", "expires_at": EXPIRES_30D}
+            for i in range(5)
+        ])
 
         # Тестируем пагинацию
         first_page = await proxy_purchase_crud.get_user_purchases(
@@ -181,7 +230,7 @@ class TestProxyPurchaseCRUD:
         second_page_ids = {p.id for p in second_page}
         assert first_page_ids.isdisjoint(second_page_ids)
 
-    async def test_get_expiring_purchases(self, db_session, test_user, test_proxy_product, test_order):
+    async def test_get_expiring_purchases(self, db_session, test_user, bulk_purchases):
         """Тест получения истекающих покупок."""
         # Создаем покупки с разными сроками истечения
         purchases_data = [
@@ -191,15 +240,10 @@ class TestProxyPurchaseCRUD:
             {"days": 10, "should_expire": False}  # Истекает через 10 дней
         ]
 
-        for i, data in enumerate(purchases_data):
-            await proxy_purchase_crud.create_purchase(
-                db_session,
-                user_id=test_user.id,
-                proxy_product_id=test_proxy_product.id,
-                order_id=test_order.id,
-                proxy_list=f"192.168.3.{i + 1}:8080:user:pass",
-                expires_at=datetime.now() + timedelta(days=data["days"])
-            )
+        await bulk_purchases([
+            {"proxy_list": f"192.168.3.{i + 1}:8080:user:pass", "expires_at": NOW + timedelta(days=data["days"])}
+            for i, data in enumerate(purchases_data)
+        ])
 
         # Получаем покупки, истекающие в ближайшие 7 дней
         expiring_purchases = await proxy_purchase_crud.get_expiring_purchases(
@@ -218,7 +262,7 @@ class TestProxyPurchaseCRUD:
 
     async def test_update_purchase(self, db_session, test_proxy_purchase):
         """Тест обновления покупки прокси."""
-        new_expires_at = datetime.now() + timedelta(days=60)
+        new_expires_at = NOW + timedelta(days=60)
 
         updated_purchase = await proxy_purchase_crud.update(
             db_session,
@@ -282,24 +326,17 @@ class TestProxyPurchaseCRUD:
         expected_total = test_proxy_purchase.traffic_used_gb + traffic_to_add
         assert updated_purchase.traffic_used_gb == expected_total
 
-    async def test_get_active_purchases_by_product(self, db_session, test_user, test_proxy_product):
+    async def test_get_active_purchases_by_product(self, db_session, test_proxy_product, bulk_purchases):
         """Тест получения активных покупок по продукту."""
-        # Создаем покупки для разных продуктов
-        purchases = []
-        for i in range(3):
-            purchase = await proxy_purchase_crud.create_purchase(
-                db_session,
-                user_id=test_user.id,
-                proxy_product_id=test_proxy_product.id,
-                order_id=1,  # Используем фиксированный order_id для теста
-                proxy_list=f"192.168.4.{i + 1}:8080:user:pass",
-                expires_at=datetime.now() + timedelta(days=30)
-            )
-            purchases.append(purchase)
-
-        # Деактивируем одну покупку
-        purchases[0].is_active = False
-        await db_session.commit()
+        # Создаем три покупки, одна из них деактивирована
+        await bulk_purchases([
+            {
+                "proxy_list": f"192.168.4.{i + 1}:8080:user:pass",
+                "expires_at": EXPIRES_30D,
+                "is_active": i != 0
+            }
+            for i in range(3)
+        ])
 
         active_purchases = await proxy_purchase_crud.get_active_purchases_by_product(
             db_session,
@@ -311,18 +348,13 @@ class TestProxyPurchaseCRUD:
         assert all(p.is_active for p in active_purchases)
         assert all(p.proxy_product_id == test_proxy_product.id for p in active_purchases)
 
-    async def test_count_user_purchases(self, db_session, test_user, test_proxy_product, test_order):
+    async def test_count_user_purchases(self, db_session, test_user, bulk_purchases):
         """Тест подсчета покупок пользователя."""
         # Создаем несколько покупок
-        for i in range(4):
-            await proxy_purchase_crud.create_purchase(
-                db_session,
-                user_id=test_user.id,
-                proxy_product_id=test_proxy_product.id,
-                order_id=test_order.id,
-                proxy_list=f"192.168.5.{i + 1}:8080:user:pass",
-                expires_at=datetime.now() + timedelta(days=30)
-            )
+        await bulk_purchases([
+            {"proxy_list": f"192.168.5.{i + 1}:8080:user:pass", "expires_at": EXPIRES_30D}
+            for i in range(4)
+        ])
 
         total_count = await proxy_purchase_crud.count_user_purchases(
             db_session,
@@ -338,18 +370,13 @@ class TestProxyPurchaseCRUD:
         assert total_count >= 4
         assert active_count >= 4
 
-    async def test_get_purchases_by_order(self, db_session, test_order, test_user, test_proxy_product):
+    async def test_get_purchases_by_order(self, db_session, test_order, bulk_purchases):
         """Тест получения покупок по заказу."""
         # Создаем покупки для конкретного заказа
-        for i in range(2):
-            await proxy_purchase_crud.create_purchase(
-                db_session,
-                user_id=test_user.id,
-                proxy_product_id=test_proxy_product.id,
-                order_id=test_order.id,
-                proxy_list=f"192.168.6.{i + 1}:8080:user:pass",
-                expires_at=datetime.now() + timedelta(days=30)
-            )
+        await bulk_purchases([
+            {"proxy_list": f"192.168.6.{i + 1}:8080:user:pass", "expires_at": EXPIRES_30D}
+            for i in range(2)
+        ])
 
         purchases = await proxy_purchase_crud.get_purchases_by_order(
             db_session,
@@ -370,22 +397,15 @@ class TestProxyPurchaseCRUD:
         deleted_purchase = await proxy_purchase_crud.get(db_session, obj_id=purchase_id)
         assert deleted_purchase is None
 
-    async def test_bulk_update_expiration(self, db_session, test_user, test_proxy_product, test_order):
+    async def test_bulk_update_expiration(self, db_session, bulk_purchases):
         """Тест массового обновления сроков истечения."""
         # Создаем покупки с одинаковой датой истечения
-        original_date = datetime.now() + timedelta(days=5)
-        purchase_ids = []
-
-        for i in range(3):
-            purchase = await proxy_purchase_crud.create_purchase(
-                db_session,
-                user_id=test_user.id,
-                proxy_product_id=test_proxy_product.id,
-                order_id=test_order.id,
-                proxy_list=f"192.168.7.{i + 1}:8080:user:pass",
-                expires_at=original_date
-            )
-            purchase_ids.append(purchase.id)
+        original_date = EXPIRES_5D
+        purchases = await bulk_purchases([
+            {"proxy_list": f"192.168.7.{i + 1}:8080:user:pass", "expires_at": original_date}
+            for i in range(3)
+        ])
+        purchase_ids = [purchase.id for purchase in purchases]
 
         # Массово продлеваем на 30 дней
         new_date = original_date + timedelta(days=30)
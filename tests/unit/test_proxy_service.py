@@ -14,6 +14,9 @@ import pytest
 from app.core.exceptions import BusinessLogicError
 from app.services.proxy_service import proxy_service
 
+# Дробная часть израсходованного трафика в моках статистики
+HALF_GB = Decimal("0.5")
+
 
 @pytest.mark.unit
 @pytest.mark.asyncio
@@ -287,7 +290,7 @@ class TestProxyService:
                 purchase = MagicMock()
                 purchase.id = i + 1
                 purchase.is_active = i < 3  # 3 активных, 2 неактивных
-                purchase.traffic_used_gb = Decimal(f"{i * 2}.5")
+                purchase.traffic_used_gb = Decimal(i * 2) + HALF_GB
                 purchase.created_at = datetime.now() - timedelta(days=i * 10)
                 mock_purchases.append(purchase)
 
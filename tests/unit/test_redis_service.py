@@ -4,6 +4,7 @@ from app.core.redis import redis_client
 
 
 @pytest.mark.unit
+@pytest.mark.xdist_group("redis")
 class TestRedisService:
 
     @pytest.mark.asyncio